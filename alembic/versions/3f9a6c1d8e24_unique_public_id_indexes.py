@@ -0,0 +1,36 @@
+"""unique_public_id_indexes
+
+Revision ID: 3f9a6c1d8e24
+Revises: e61b3f8d2c57
+Create Date: 2026-10-18 17:03:12.904115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a6c1d8e24'
+down_revision: Union[str, None] = 'e61b3f8d2c57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+tables = ['athletes', 'gyms', 'categories']
+
+
+def upgrade() -> None:
+    if op.get_context().dialect.name == 'postgresql':
+        # Built without blocking writes to the tables; fails if an id is already repeated
+        with op.get_context().autocommit_block():
+            for table_name in tables:
+                op.create_index(f'ix_{table_name}_id', table_name, ['id'], unique=True, postgresql_concurrently=True)
+    else:
+        for table_name in tables:
+            op.create_index(f'ix_{table_name}_id', table_name, ['id'], unique=True)
+
+
+def downgrade() -> None:
+    for table_name in reversed(tables):
+        op.drop_index(f'ix_{table_name}_id', table_name=table_name)
@@ -0,0 +1,26 @@
+"""athletes_keyset_index
+
+Revision ID: 5b1e7c9a2f40
+Revises: d4a44e0c0208
+Create Date: 2026-10-18 09:12:31.402215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1e7c9a2f40'
+down_revision: Union[str, None] = 'd4a44e0c0208'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_athletes_created_at_pk_id', 'athletes', ['created_at', 'pk_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_athletes_created_at_pk_id', table_name='athletes')
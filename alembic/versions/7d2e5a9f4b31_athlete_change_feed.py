@@ -0,0 +1,81 @@
+"""athlete_change_feed
+
+Revision ID: 7d2e5a9f4b31
+Revises: 3f9a6c1d8e24
+Create Date: 2026-10-18 18:25:47.361092
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d2e5a9f4b31'
+down_revision: Union[str, None] = '3f9a6c1d8e24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+athlete_indexes = [
+    ('ix_athletes_change_txid_id', ['change_txid', 'id']),
+    ('ix_athletes_updated_at_change_txid', ['updated_at', 'change_txid']),
+]
+
+
+def upgrade() -> None:
+    if op.get_context().dialect.name == 'postgresql':
+        # Constant defaults only touch the catalog, so athletes isn't rewritten nor locked for an UPDATE;
+        # existing athletes count as changed when the migration ran, ahead of any transaction to come.
+        # The defaults are dropped right away: new rows must set both columns themselves
+        op.add_column('athletes', sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text('LOCALTIMESTAMP')))
+        op.add_column('athletes', sa.Column('change_txid', sa.BigInteger(), nullable=False, server_default='0'))
+        op.alter_column('athletes', 'updated_at', server_default=None)
+        op.alter_column('athletes', 'change_txid', server_default=None)
+    else:
+        # Existing athletes count as changed when they were created
+        op.add_column('athletes', sa.Column('updated_at', sa.DateTime(), nullable=True))
+        op.add_column('athletes', sa.Column('change_txid', sa.BigInteger(), nullable=True))
+        op.execute('UPDATE athletes SET updated_at = created_at, change_txid = 0')
+        with op.batch_alter_table('athletes') as batch_op:
+            batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False)
+            batch_op.alter_column('change_txid', existing_type=sa.BigInteger(), nullable=False)
+
+    op.create_table('athlete_tombstones',
+    sa.Column('pk_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.Column('change_txid', sa.BigInteger(), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.PrimaryKeyConstraint('pk_id')
+    )
+    op.create_index('ix_athlete_tombstones_change_txid_id', 'athlete_tombstones', ['change_txid', 'id'], unique=False)
+    op.create_index('ix_athlete_tombstones_deleted_at_change_txid', 'athlete_tombstones', ['deleted_at', 'change_txid'], unique=False)
+    op.create_index('ix_athlete_tombstones_id', 'athlete_tombstones', ['id'], unique=True)
+
+    if op.get_context().dialect.name == 'postgresql':
+        # Built without blocking writes to athletes
+        with op.get_context().autocommit_block():
+            for index_name, columns in athlete_indexes:
+                op.create_index(index_name, 'athletes', columns, unique=False, postgresql_concurrently=True)
+    else:
+        for index_name, columns in athlete_indexes:
+            op.create_index(index_name, 'athletes', columns, unique=False)
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for index_name, _ in reversed(athlete_indexes):
+                op.drop_index(index_name, table_name='athletes', postgresql_concurrently=True)
+    else:
+        for index_name, _ in reversed(athlete_indexes):
+            op.drop_index(index_name, table_name='athletes')
+
+    op.drop_index('ix_athlete_tombstones_id', table_name='athlete_tombstones')
+    op.drop_index('ix_athlete_tombstones_deleted_at_change_txid', table_name='athlete_tombstones')
+    op.drop_index('ix_athlete_tombstones_change_txid_id', table_name='athlete_tombstones')
+    op.drop_table('athlete_tombstones')
+    with op.batch_alter_table('athletes') as batch_op:
+        batch_op.drop_column('change_txid')
+        batch_op.drop_column('updated_at')
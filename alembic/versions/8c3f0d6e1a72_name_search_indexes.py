@@ -0,0 +1,49 @@
+"""name_search_indexes
+
+Revision ID: 8c3f0d6e1a72
+Revises: 5b1e7c9a2f40
+Create Date: 2026-10-18 10:03:47.118902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c3f0d6e1a72'
+down_revision: Union[str, None] = '5b1e7c9a2f40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+trgm_indexes = [
+    ('ix_athletes_name_trgm', 'athletes', 'name'),
+    ('ix_athletes_cpf_trgm', 'athletes', 'cpf'),
+    ('ix_gyms_name_trgm', 'gyms', 'name'),
+    ('ix_categories_name_trgm', 'categories', 'name'),
+]
+
+
+def upgrade() -> None:
+    if op.get_context().dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        # Built without blocking writes to the tables
+        with op.get_context().autocommit_block():
+            for index_name, table_name, column_name in trgm_indexes:
+                op.create_index(
+                    index_name, table_name, [column_name], unique=False, postgresql_using='gin',
+                    postgresql_ops={column_name: 'gin_trgm_ops'}, postgresql_concurrently=True
+                )
+    else:
+        # Plain B-tree for prefix search; cpf, gyms.name and categories.name are covered by their unique constraints
+        op.create_index('ix_athletes_name_trgm', 'athletes', ['name'], unique=False)
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for index_name, table_name, _ in reversed(trgm_indexes):
+                op.drop_index(index_name, table_name=table_name, postgresql_concurrently=True)
+    else:
+        op.drop_index('ix_athletes_name_trgm', table_name='athletes')
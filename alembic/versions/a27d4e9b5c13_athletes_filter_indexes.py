@@ -0,0 +1,50 @@
+"""athletes_filter_indexes
+
+Revision ID: a27d4e9b5c13
+Revises: 8c3f0d6e1a72
+Create Date: 2026-10-18 10:41:05.583120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a27d4e9b5c13'
+down_revision: Union[str, None] = '8c3f0d6e1a72'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+indexes = [
+    ('ix_athletes_age', ['age']),
+    ('ix_athletes_weight', ['weight']),
+    ('ix_athletes_height', ['height']),
+    # Leading columns also serve the sex and gym_id lookups on their own
+    ('ix_athletes_sex_age', ['sex', 'age']),
+    ('ix_athletes_category_id', ['category_id']),
+    ('ix_athletes_gym_id_created_at', ['gym_id', 'created_at']),
+]
+
+
+def upgrade() -> None:
+    if op.get_context().dialect.name == 'postgresql':
+        # Built without blocking writes to athletes
+        with op.get_context().autocommit_block():
+            for index_name, columns in indexes:
+                op.create_index(index_name, 'athletes', columns, unique=False, postgresql_concurrently=True)
+    else:
+        for index_name, columns in indexes:
+            op.create_index(index_name, 'athletes', columns, unique=False)
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for index_name, _ in reversed(indexes):
+                op.drop_index(index_name, table_name='athletes', postgresql_concurrently=True)
+    else:
+        for index_name, _ in reversed(indexes):
+            op.drop_index(index_name, table_name='athletes')
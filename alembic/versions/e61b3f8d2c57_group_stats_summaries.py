@@ -0,0 +1,49 @@
+"""group_stats_summaries
+
+Revision ID: e61b3f8d2c57
+Revises: a27d4e9b5c13
+Create Date: 2026-10-18 16:12:40.218734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e61b3f8d2c57'
+down_revision: Union[str, None] = 'a27d4e9b5c13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Filled by make stats-rebuild when STATS_SUMMARY is turned on
+    op.create_table('gym_stats',
+    sa.Column('pk_id', sa.Integer(), nullable=False),
+    sa.Column('athletes', sa.Integer(), nullable=False),
+    sa.Column('male', sa.Integer(), nullable=False),
+    sa.Column('female', sa.Integer(), nullable=False),
+    sa.Column('age_sum', sa.BigInteger(), nullable=False),
+    sa.Column('weight_sum', sa.Float(), nullable=False),
+    sa.Column('height_sum', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['pk_id'], ['gyms.pk_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('pk_id')
+    )
+    op.create_table('category_stats',
+    sa.Column('pk_id', sa.Integer(), nullable=False),
+    sa.Column('athletes', sa.Integer(), nullable=False),
+    sa.Column('male', sa.Integer(), nullable=False),
+    sa.Column('female', sa.Integer(), nullable=False),
+    sa.Column('age_sum', sa.BigInteger(), nullable=False),
+    sa.Column('weight_sum', sa.Float(), nullable=False),
+    sa.Column('height_sum', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['pk_id'], ['categories.pk_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('pk_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('category_stats')
+    op.drop_table('gym_stats')
@@ -0,0 +1,123 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmarks.run import git_commit
+
+# Times GET /athletes/{id} while the athletes table grows, to check the lookup doesn't depend on its size, e.g.
+#   python -m benchmarks.by_id --sizes 1000,10000,100000,1000000
+# The tables of --db-url are dropped and seeded again. Responses are not cached during the run.
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog = "python -m benchmarks.by_id", description = "Benchmark athlete lookups by id against table size")
+    parser.add_argument("--db-url", default = "sqlite+aiosqlite:///bench.sqlite", help = "scratch database, its tables are recreated")
+    parser.add_argument("--sizes", default = "1000,10000,100000,1000000", help = "athletes in the table at each measurement")
+    parser.add_argument("--lookups", type = int, default = 1000, help = "timed requests per size")
+    parser.add_argument("--seed", type = int, default = 42, help = "seeds both the data and the looked up ids")
+    parser.add_argument("--output", help = "results file, benchmarks/results/by_id-<commit>-<time>.json by default")
+    return parser.parse_args()
+
+
+def percentiles(latencies: list[float]) -> dict:
+    cuts = statistics.quantiles(latencies, n = 100, method = "inclusive") if len(latencies) > 1 else latencies * 99
+    return {
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "p50_ms": round(cuts[49], 3),
+        "p95_ms": round(cuts[94], 3),
+        "p99_ms": round(cuts[98], 3),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    import httpx
+    from sqlalchemy import bindparam, func, select, text
+
+    from benchmarks.seed import add_athletes, seed
+    from workout_api.athletes.models import AthleteModel
+    from workout_api.configs.database import async_session, engine
+    from workout_api.main import app
+
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    rng = random.Random(args.seed)
+    await seed(rng, 0, 20, 10)
+    cpf_bases = rng.sample(range(10 ** 9), sizes[-1])
+
+    explain = "EXPLAIN QUERY PLAN" if engine.dialect.name == "sqlite" else "EXPLAIN"
+    plan_query = text(f"{explain} SELECT pk_id FROM {AthleteModel.__tablename__} WHERE id = :id").bindparams(
+        bindparam("id", type_ = AthleteModel.id.type)
+    )
+
+    results = []
+    seeded = 0
+    try:
+        async with httpx.AsyncClient(transport = httpx.ASGITransport(app = app), base_url = "http://bench") as client:
+            for size in sizes:
+                started = time.perf_counter()
+                await add_athletes(rng, cpf_bases[seeded:size])
+                seeded = size
+                print(f"Seeded {size} athletes in {time.perf_counter() - started:.1f}s", file = sys.stderr)
+
+                # Ids drawn from the whole table, so old and new rows are both looked up
+                async with async_session() as db_session:
+                    low, high = (await db_session.execute(select(func.min(AthleteModel.pk_id), func.max(AthleteModel.pk_id)))).one()
+                    pk_ids = [rng.randint(low, high) for _ in range(args.lookups)]
+                    ids = []
+                    for start in range(0, len(pk_ids), 1000):
+                        ids += (await db_session.scalars(select(AthleteModel.id).where(AthleteModel.pk_id.in_(pk_ids[start:start + 1000])))).all()
+                    plan = [" ".join(map(str, row)) for row in (await db_session.execute(plan_query, {"id": ids[0]})).all()]
+
+                latencies = []
+                for id in ids:
+                    start = time.perf_counter()
+                    response = await client.get(f"/athletes/{id}")
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    if response.status_code != 200:
+                        sys.exit(f"GET /athletes/{id} returned {response.status_code}")
+                results.append({"athletes": size, "lookups": len(latencies), **percentiles(latencies), "plan": plan})
+    finally:
+        await engine.dispose()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec = "seconds"),
+            "commit": git_commit(),
+            "dialect": engine.dialect.name,
+            "args": {key: value for key, value in vars(args).items() if key != "output"},
+        },
+        "sizes": results,
+        # Close to 1 when the lookup is an index seek
+        "p50_growth": round(results[-1]["p50_ms"] / results[0]["p50_ms"], 2),
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    # Settings are read when workout_api is imported; cached responses would hide the query
+    os.environ["DB_URL"] = args.db_url
+    os.environ["RESPONSE_CACHE_BACKEND"] = "none"
+    results = asyncio.run(run(args))
+    output = args.output or os.path.join(
+        os.path.dirname(__file__), "results", f"by_id-{results['meta']['commit'] or 'nocommit'}-{datetime.now():%Y%m%d%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok = True)
+    with open(output, "w") as file:
+        json.dump(results, file, indent = 2)
+
+    print(f"{'athletes':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  plan", file = sys.stderr)
+    for result in results["sizes"]:
+        print(
+            f"{result['athletes']:>9} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f}  {' | '.join(result['plan'])}",
+            file = sys.stderr
+        )
+    print(f"p50 x{results['p50_growth']} from {results['sizes'][0]['athletes']} to {results['sizes'][-1]['athletes']} athletes, results written to {output}", file = sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
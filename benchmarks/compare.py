@@ -0,0 +1,54 @@
+import argparse
+import json
+import sys
+
+# Compares two results files written by benchmarks.run and exits with 1 on a regression, e.g.
+#   python -m benchmarks.compare benchmarks/results/base.json benchmarks/results/new.json
+
+
+def change(base: float, new: float) -> float:
+    return (new - base) / base if base else 0.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog = "python -m benchmarks.compare", description = "Compare two benchmark results")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type = float, default = 0.10, help = "relative p95 increase counted as a regression")
+    args = parser.parse_args()
+
+    with open(args.base) as file:
+        base = json.load(file)
+    with open(args.new) as file:
+        new = json.load(file)
+
+    if base["meta"]["args"] != new["meta"]["args"] or base["meta"]["settings"] != new["meta"]["settings"]:
+        print("Warning: the runs used different arguments or settings", file = sys.stderr)
+
+    regressions = []
+    print(f"{'operation':<12} {'p50 ms':>20} {'p95 ms':>20} {'p99 ms':>20} {'queries':>11}")
+    for operation in [*sorted(set(base["operations"]) & set(new["operations"])), "total"]:
+        before = base["total"] if operation == "total" else base["operations"][operation]
+        after = new["total"] if operation == "total" else new["operations"][operation]
+        columns = [
+            f"{before[key]:>7.2f} {after[key]:>7.2f} {change(before[key], after[key]):>+4.0%}"
+            for key in ("p50_ms", "p95_ms", "p99_ms")
+        ]
+        print(f"{operation:<12} {' '.join(columns)} {str(before['queries_per_request']):>5} {str(after['queries_per_request']):>5}")
+
+        # Latency is noisy, statements per request only move with cache hits
+        if change(before["p95_ms"], after["p95_ms"]) > args.threshold:
+            regressions.append(f"{operation}: p95 {before['p95_ms']} -> {after['p95_ms']} ms")
+        if (after["queries_per_request"] or 0) - (before["queries_per_request"] or 0) > 0.1:
+            regressions.append(f"{operation}: queries per request {before['queries_per_request']} -> {after['queries_per_request']}")
+        if after["errors"] > before["errors"]:
+            regressions.append(f"{operation}: errors {before['errors']} -> {after['errors']}")
+
+    print(f"throughput {base['total']['throughput']} -> {new['total']['throughput']} requests/s")
+    if regressions:
+        print("Regressions:\n  " + "\n  ".join(regressions), file = sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+import random
+from datetime import datetime
+from uuid import uuid4
+
+first_names = ["Ana", "Bruno", "Carla", "Diego", "Elisa", "Felipe", "Gabriela", "Hugo", "Isabela", "João", "Larissa", "Marcos", "Natalia", "Otavio", "Paula", "Rafael"]
+
+
+def cpf_from(base: int) -> str:
+    # Nine digits plus both verifier digits, so every seeded CPF is valid and unique per base
+    digits = [int(digit) for digit in f"{base:09d}"]
+    for weight in (10, 11):
+        remainder = sum(digit * (weight - i) for i, digit in enumerate(digits)) % 11
+        digits.append(0 if remainder < 2 else 11 - remainder)
+    return "".join(map(str, digits))
+
+
+def athlete_row(rng: random.Random, cpf: str, category_ids: list[int], gym_ids: list[int]) -> dict:
+    created_at = datetime.now()
+    return {
+        "id": uuid4(),
+        "name": f"{rng.choice(first_names)} {rng.randrange(100000)}",
+        "cpf": cpf,
+        "age": rng.randint(14, 70),
+        "weight": round(rng.uniform(45, 140), 1),
+        "height": round(rng.uniform(1.45, 2.10), 2),
+        "sex": rng.choice("mf"),
+        "created_at": created_at,
+        "updated_at": created_at,
+        "category_id": rng.choice(category_ids),
+        "gym_id": rng.choice(gym_ids),
+    }
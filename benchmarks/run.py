@@ -0,0 +1,244 @@
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from benchmarks.data import cpf_from, first_names
+
+# Replays a weighted mix of the API routes against seeded data and writes latency percentiles,
+# throughput and queries per request to JSON, e.g.
+#   python -m benchmarks.run --athletes 20000 --requests 5000 --concurrency 20
+# The tables of --db-url are dropped and seeded again unless --skip-seed is given.
+
+default_mix = "get_by_id=25,page=15,name=10,search_name=10,age=10,weight=10,cursor=5,post=10,patch=5"
+
+# Statements issued on behalf of the request being timed, counted by the cursor_execute hook
+current_queries: contextvars.ContextVar[Optional[list[int]]] = contextvars.ContextVar("current_queries", default = None)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog = "python -m benchmarks.run", description = "Benchmark the Workout API routes")
+    parser.add_argument("--db-url", default = "sqlite+aiosqlite:///bench.sqlite", help = "scratch database, its tables are recreated")
+    parser.add_argument("--url", help = "base URL of a running server (e.g. uvicorn) instead of the in-process ASGI app")
+    parser.add_argument("--athletes", type = int, default = 10000)
+    parser.add_argument("--gyms", type = int, default = 20)
+    parser.add_argument("--categories", type = int, default = 10)
+    parser.add_argument("--skip-seed", action = "store_true", help = "reuse the data already in --db-url")
+    parser.add_argument("--requests", type = int, default = 2000, help = "timed requests")
+    parser.add_argument("--warmup", type = int, default = 100, help = "untimed requests sent first")
+    parser.add_argument("--concurrency", type = int, default = 10)
+    parser.add_argument("--mix", default = default_mix, help = "operation=weight pairs")
+    parser.add_argument("--seed", type = int, default = 42, help = "seeds both the data and the request sequence")
+    parser.add_argument("--output", help = "results file, benchmarks/results/<commit>-<time>.json by default")
+    return parser.parse_args()
+
+
+def parse_mix(mix: str) -> dict[str, int]:
+    weights = {}
+    for pair in mix.split(","):
+        operation, _, weight = pair.partition("=")
+        if operation.strip() not in operations:
+            sys.exit(f"Unknown operation {operation!r}, choose from {', '.join(operations)}")
+        weights[operation.strip()] = int(weight or 1)
+    return weights
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output = True, text = True, check = True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Workload:
+    # Request factories, all drawing from the same seeded generator so a run can be replayed
+    def __init__(self, rng: random.Random, ids: list, categories: int, gyms: int) -> None:
+        self.rng = rng
+        self.ids = ids
+        self.categories = categories
+        self.gyms = gyms
+        # CPFs of posted athletes stay in the database across runs, they must not repeat
+        self.cpfs = random.Random()
+
+    def get_by_id(self) -> tuple[str, str, Optional[dict]]:
+        return "GET", f"/athletes/{self.rng.choice(self.ids)}", None
+
+    def page(self) -> tuple[str, str, Optional[dict]]:
+        return "GET", f"/athletes/?page={self.rng.randint(1, 20)}&size=50", None
+
+    def cursor(self) -> tuple[str, str, Optional[dict]]:
+        return "GET", "/athletes/cursor/?size=50", None
+
+    def name(self) -> tuple[str, str, Optional[dict]]:
+        return "GET", f"/athletes/name:{self.rng.choice(first_names)}", None
+
+    def search_name(self) -> tuple[str, str, Optional[dict]]:
+        return "GET", f"/athletes/search:{self.rng.choice(first_names)[:3]}", None
+
+    def age(self) -> tuple[str, str, Optional[dict]]:
+        age = self.rng.randint(14, 68)
+        return "GET", f"/athletes/age:range?min_age={age}&max_age={age + 2}", None
+
+    def weight(self) -> tuple[str, str, Optional[dict]]:
+        weight = self.rng.randint(45, 135)
+        return "GET", f"/athletes/weight:range?min_weight={weight}&max_weight={weight + 5}", None
+
+    def post(self) -> tuple[str, str, Optional[dict]]:
+        return "POST", "/athletes/", {
+            "name": f"{self.rng.choice(first_names)} bench",
+            "cpf": cpf_from(self.cpfs.randrange(10 ** 9)),
+            "age": self.rng.randint(14, 70),
+            "weight": round(self.rng.uniform(45, 140), 1),
+            "height": round(self.rng.uniform(1.45, 2.10), 2),
+            "sex": self.rng.choice("mf"),
+            "category": {"name": f"Category {self.rng.randrange(self.categories)}"},
+            "gym": {"name": f"Gym {self.rng.randrange(self.gyms)}"},
+        }
+
+    def patch(self) -> tuple[str, str, Optional[dict]]:
+        return "PATCH", f"/athletes/{self.rng.choice(self.ids)}", {"weight": round(self.rng.uniform(45, 140), 1)}
+
+
+operations = [name for name in vars(Workload) if not name.startswith("_")]
+
+
+def summary(samples: list[tuple[float, int, Optional[int]]], seconds: float) -> dict:
+    latencies = sorted(latency for latency, _, _ in samples)
+    queries = [count for _, _, count in samples if count is not None]
+    # Percentile cut points 1..99, inclusive of the observed minimum and maximum
+    cuts = statistics.quantiles(latencies, n = 100, method = "inclusive") if len(latencies) > 1 else latencies * 99
+    statuses: dict[str, int] = {}
+    for _, status_code, _ in samples:
+        statuses[str(status_code)] = statuses.get(str(status_code), 0) + 1
+    return {
+        "requests": len(samples),
+        "throughput": round(len(samples) / seconds, 1),
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "p50_ms": round(cuts[49], 3),
+        "p95_ms": round(cuts[94], 3),
+        "p99_ms": round(cuts[98], 3),
+        "max_ms": round(latencies[-1], 3),
+        "queries_per_request": round(statistics.fmean(queries), 2) if queries else None,
+        "errors": sum(count for status_code, count in statuses.items() if int(status_code) >= 500),
+        "status": statuses,
+    }
+
+
+async def replay(client, plan: list[tuple[str, str, str, Optional[dict]]], concurrency: int, counts_queries: bool) -> tuple[dict[str, list], float]:
+    samples: dict[str, list] = {}
+    queue = iter(plan)
+
+    async def worker() -> None:
+        for operation, method, path, body in queue:
+            queries = [0]
+            current_queries.set(queries)
+            start = time.perf_counter()
+            response = await client.request(method, path, json = body)
+            latency = (time.perf_counter() - start) * 1000
+            samples.setdefault(operation, []).append((latency, response.status_code, queries[0] if counts_queries else None))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples, time.perf_counter() - started
+
+
+async def run(args: argparse.Namespace) -> dict:
+    import httpx
+    from sqlalchemy import event
+
+    from benchmarks.seed import seed, seeded_data
+    from workout_api.configs.database import engine, read_engines
+    from workout_api.configs.settings import settings
+    from workout_api.main import app
+
+    rng = random.Random(args.seed)
+    if not args.skip_seed:
+        started = time.perf_counter()
+        await seed(rng, args.athletes, args.gyms, args.categories)
+        print(f"Seeded {args.athletes} athletes in {time.perf_counter() - started:.1f}s", file = sys.stderr)
+    ids, categories, gyms = await seeded_data()
+
+    def count_query(*args) -> None:
+        queries = current_queries.get()
+        if queries is not None:
+            queries[0] += 1
+
+    for sync_engine in (engine.sync_engine, *(read_engine.sync_engine for read_engine in read_engines)):
+        event.listen(sync_engine, "before_cursor_execute", count_query)
+
+    # Separate generator, so the request sequence is the same with or without --skip-seed
+    rng = random.Random(f"{args.seed}-requests")
+    workload = Workload(rng, ids, categories, gyms)
+    weights = parse_mix(args.mix)
+    choices = rng.choices(list(weights), weights = list(weights.values()), k = args.warmup + args.requests)
+    plan = [(operation, *getattr(workload, operation)()) for operation in choices]
+
+    # Queries are only seen when the app runs in this process
+    if args.url:
+        client = httpx.AsyncClient(base_url = args.url, limits = httpx.Limits(max_connections = args.concurrency))
+    else:
+        client = httpx.AsyncClient(transport = httpx.ASGITransport(app = app), base_url = "http://bench")
+    try:
+        async with client:
+            await replay(client, plan[:args.warmup], args.concurrency, not args.url)
+            samples, seconds = await replay(client, plan[args.warmup:], args.concurrency, not args.url)
+    finally:
+        await engine.dispose()
+        for read_engine in read_engines:
+            await read_engine.dispose()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec = "seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "dialect": engine.dialect.name,
+            "target": args.url or "asgi",
+            "args": {key: value for key, value in vars(args).items() if key != "output"},
+            "settings": {
+                "RESPONSE_CACHE_BACKEND": settings.RESPONSE_CACHE_BACKEND,
+                "FAST_LIST_SERIALIZATION": settings.FAST_LIST_SERIALIZATION,
+                "PAGINATION_APPROXIMATE_COUNT": settings.PAGINATION_APPROXIMATE_COUNT,
+                "WRITE_BATCHING": settings.WRITE_BATCHING,
+                "DB_POOL_SIZE": settings.DB_POOL_SIZE,
+                "READ_REPLICAS": len(settings.READ_DB_URLS),
+            },
+        },
+        "total": summary([sample for operation_samples in samples.values() for sample in operation_samples], seconds),
+        "operations": {operation: summary(samples[operation], seconds) for operation in sorted(samples)},
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    # Settings are read when workout_api is imported, so the database is chosen first
+    os.environ["DB_URL"] = args.db_url
+    results = asyncio.run(run(args))
+    output = args.output or os.path.join(
+        os.path.dirname(__file__), "results", f"{results['meta']['commit'] or 'nocommit'}-{datetime.now():%Y%m%d%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok = True)
+    with open(output, "w") as file:
+        json.dump(results, file, indent = 2)
+
+    print(f"{'operation':<12} {'requests':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8}", file = sys.stderr)
+    for operation, result in [*results["operations"].items(), ("total", results["total"])]:
+        print(
+            f"{operation:<12} {result['requests']:>8} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} "
+            f"{result['queries_per_request'] if result['queries_per_request'] is not None else '-':>8}",
+            file = sys.stderr
+        )
+    print(f"{results['total']['throughput']} requests/s, results written to {output}", file = sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import random
+from uuid import UUID
+
+from sqlalchemy import func, select, text
+
+from benchmarks.data import athlete_row, cpf_from
+from workout_api.athletes.bulk import insert_athletes
+from workout_api.athletes.models import AthleteModel
+from workout_api.categories.models import CategoryModel
+from workout_api.configs.database import async_session, engine
+from workout_api.contrib.models import BaseModel
+from workout_api.gyms.models import GymModel
+
+async def reset_schema() -> None:
+    async with engine.begin() as connection:
+        if connection.dialect.name == "postgresql":
+            await connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await connection.run_sync(BaseModel.metadata.drop_all)
+        await connection.run_sync(BaseModel.metadata.create_all)
+
+
+async def seed(rng: random.Random, athletes: int, gyms: int, categories: int) -> None:
+    await reset_schema()
+    async with async_session() as db_session:
+        db_session.add_all([CategoryModel(name = f"Category {i}") for i in range(categories)])
+        db_session.add_all([GymModel(name = f"Gym {i}", address = f"Street {i}", owner = f"Owner {i}") for i in range(gyms)])
+        await db_session.commit()
+    await add_athletes(rng, rng.sample(range(10 ** 9), athletes))
+
+
+async def add_athletes(rng: random.Random, cpf_bases: list[int]) -> None:
+    # One athlete per CPF base, spread over the seeded categories and gyms
+    async with async_session() as db_session:
+        category_ids = (await db_session.scalars(select(CategoryModel.pk_id))).all()
+        gym_ids = (await db_session.scalars(select(GymModel.pk_id))).all()
+
+        for start in range(0, len(cpf_bases), 10000):
+            await insert_athletes(db_session, [
+                athlete_row(rng, cpf_from(base), category_ids, gym_ids) for base in cpf_bases[start:start + 10000]
+            ])
+            await db_session.commit()
+
+
+async def seeded_data() -> tuple[list[UUID], int, int]:
+    # Athlete ids to look up and patch, and how many categories and gyms posts can reference
+    async with async_session() as db_session:
+        ids = (await db_session.scalars(select(AthleteModel.id).order_by(AthleteModel.pk_id))).all()
+        categories = await db_session.scalar(select(func.count()).select_from(CategoryModel))
+        gyms = await db_session.scalar(select(func.count()).select_from(GymModel))
+    return list(ids), categories, gyms
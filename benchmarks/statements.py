@@ -0,0 +1,223 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmarks.data import first_names
+from benchmarks.run import git_commit
+
+# Per-request CPU time of the hot lookups, with statements built for each request ("built") against the
+# statements the controllers build once and execute with bound values ("prepared"), e.g.
+#   python -m benchmarks.statements --athletes 10000 --calls 2000
+# Then the same routes through the ASGI app, without the response cache; run it on two commits to compare those.
+# CPU is time.process_time(), so with SQLite it includes the database's own work in the aiosqlite thread.
+# The tables of --db-url are dropped and seeded again.
+
+PAGE_SIZE = 50
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog = "python -m benchmarks.statements", description = "Benchmark built per request against prepared statements")
+    parser.add_argument("--db-url", default = "sqlite+aiosqlite:///bench.sqlite", help = "scratch database, its tables are recreated")
+    parser.add_argument("--athletes", type = int, default = 10000)
+    parser.add_argument("--calls", type = int, default = 2000, help = "timed calls per query and variant")
+    parser.add_argument("--warmup", type = int, default = 100, help = "untimed calls sent first, they fill the statement caches")
+    parser.add_argument("--seed", type = int, default = 42, help = "seeds both the data and the looked up values")
+    parser.add_argument("--output", help = "results file, benchmarks/results/statements-<commit>-<time>.json by default")
+    return parser.parse_args()
+
+
+def summary(cpu_times: list[float]) -> dict:
+    return {
+        "mean_us": round(statistics.fmean(cpu_times) * 1e6, 1),
+        "p50_us": round(statistics.median(cpu_times) * 1e6, 1),
+    }
+
+
+def cases() -> dict:
+    from fastapi_pagination.ext.sqlalchemy import create_count_query
+    from sqlalchemy import select
+
+    from workout_api.athletes import queries
+    from workout_api.athletes.models import AthleteModel
+    from workout_api.categories.controller import category_name_page
+    from workout_api.categories.models import CategoryModel
+    from workout_api.gyms.controller import gym_name_page
+    from workout_api.gyms.models import GymModel
+
+    def built_page(query, models = True) -> list:
+        # What paginate_athletes and paginate ran before: count, then the page with its names
+        page = queries.with_names(query) if models else query
+        return [(create_count_query(query), None), (page.limit(PAGE_SIZE).offset(0), None)]
+
+    def prepared_page(query, values: dict) -> list:
+        return [(query.count_query, values), (query.page_query, {**values, "limit": PAGE_SIZE, "offset": 0})]
+
+    # name -> functions of a looked up value: its route, its statements built per request, its prepared statements
+    return {
+        "by_id": (
+            lambda id: f"/athletes/{id}",
+            lambda id: [(queries.with_names(select(AthleteModel).filter_by(id = id)), None)],
+            lambda id: [(queries.athlete_by_id, {"id": id})],
+        ),
+        "name": (
+            lambda name: f"/athletes/name:{name}?size={PAGE_SIZE}",
+            lambda name: built_page(select(AthleteModel).where(AthleteModel.name.contains(name)).order_by(AthleteModel.pk_id)),
+            lambda name: prepared_page(queries.athlete_name_page.models, {"name": name}),
+        ),
+        "cpf": (
+            lambda cpf: f"/athletes/cpf:{cpf}?size={PAGE_SIZE}",
+            lambda cpf: built_page(select(AthleteModel).where(AthleteModel.cpf.contains(cpf)).order_by(AthleteModel.pk_id)),
+            lambda cpf: prepared_page(queries.athlete_cpf_page.models, {"cpf": cpf}),
+        ),
+        "sex": (
+            lambda sex: f"/athletes/sex:{sex}?size={PAGE_SIZE}",
+            lambda sex: built_page(queries.athletes_by_sex(sex).order_by(AthleteModel.pk_id)),
+            lambda sex: prepared_page(queries.athlete_sex_page.models, {"sex": sex}),
+        ),
+        "age": (
+            lambda ages: f"/athletes/age:x?min_age={ages[0]}&max_age={ages[1]}&size={PAGE_SIZE}",
+            lambda ages: built_page(queries.athletes_by_age(*ages).order_by(AthleteModel.pk_id)),
+            lambda ages: prepared_page(queries.athlete_age_page.models, {"min_age": ages[0], "max_age": ages[1]}),
+        ),
+        "weight": (
+            lambda weights: f"/athletes/weight:x?min_weight={weights[0]}&max_weight={weights[1]}&size={PAGE_SIZE}",
+            lambda weights: built_page(queries.athletes_by_weight(*weights).order_by(AthleteModel.pk_id)),
+            lambda weights: prepared_page(queries.athlete_weight_page.models, {"min_weight": weights[0], "max_weight": weights[1]}),
+        ),
+        "height": (
+            lambda heights: f"/athletes/height:x?min_height={heights[0]}&max_height={heights[1]}&size={PAGE_SIZE}",
+            lambda heights: built_page(queries.athletes_by_height(*heights).order_by(AthleteModel.pk_id)),
+            lambda heights: prepared_page(queries.athlete_height_page.models, {"min_height": heights[0], "max_height": heights[1]}),
+        ),
+        "category_name": (
+            lambda name: f"/categories/name:{name}?size={PAGE_SIZE}",
+            lambda name: built_page(select(CategoryModel).where(CategoryModel.name.contains(name)).order_by(CategoryModel.pk_id), models = False),
+            lambda name: prepared_page(category_name_page, {"name": name}),
+        ),
+        "gym_name": (
+            lambda name: f"/gyms/name:{name}?size={PAGE_SIZE}",
+            lambda name: built_page(select(GymModel).where(GymModel.name.contains(name)).order_by(GymModel.pk_id), models = False),
+            lambda name: prepared_page(gym_name_page, {"name": name}),
+        ),
+    }
+
+
+def draw(case: str, rng: random.Random, ids: list, categories: list[str], gyms: list[str]):
+    # The looked up value of one call
+    if case == "by_id":
+        return rng.choice(ids)
+    if case == "name":
+        return rng.choice(first_names)
+    if case == "cpf":
+        return f"{rng.randrange(1000):03d}"
+    if case == "sex":
+        return rng.choice("mf")
+    if case == "age":
+        start = rng.randint(14, 60)
+        return start, start + rng.randint(1, 10)
+    if case == "weight":
+        start = rng.randint(45, 130)
+        return start, start + rng.randint(1, 10)
+    if case == "height":
+        start = round(rng.uniform(1.45, 2.0), 2)
+        return start, round(start + rng.uniform(0.01, 0.1), 2)
+    return rng.choice(categories if case == "category_name" else gyms)
+
+
+async def run(args: argparse.Namespace) -> dict:
+    import httpx
+    from sqlalchemy import select
+
+    from benchmarks.seed import seed, seeded_data
+    from workout_api.categories.models import CategoryModel
+    from workout_api.configs.database import async_session, engine
+    from workout_api.gyms.models import GymModel
+    from workout_api.main import app
+
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    await seed(rng, args.athletes, 20, 10)
+    print(f"Seeded {args.athletes} athletes in {time.perf_counter() - started:.1f}s", file = sys.stderr)
+    ids, _, _ = await seeded_data()
+    async with async_session() as db_session:
+        categories = (await db_session.scalars(select(CategoryModel.name))).all()
+        gyms = (await db_session.scalars(select(GymModel.name))).all()
+
+    results = {}
+    try:
+        async with httpx.AsyncClient(transport = httpx.ASGITransport(app = app), base_url = "http://bench") as client:
+            for case, (route, built, prepared) in cases().items():
+                # The same values for every variant
+                case_rng = random.Random(f"{args.seed}-{case}")
+                values = [draw(case, case_rng, ids, categories, gyms) for _ in range(args.warmup + args.calls)]
+                result = {}
+                for variant, statements_of in (("built", built), ("prepared", prepared)):
+                    cpu_times = []
+                    async with async_session() as db_session:
+                        for call, value in enumerate(values):
+                            # Building the statements is part of the request's work
+                            start = time.process_time()
+                            for statement, parameters in statements_of(value):
+                                (await db_session.execute(statement, parameters)).all()
+                            if call >= args.warmup:
+                                cpu_times.append(time.process_time() - start)
+                            db_session.expunge_all()
+                    result[variant] = summary(cpu_times)
+
+                cpu_times = []
+                for call, value in enumerate(values):
+                    path = route(value)
+                    start = time.process_time()
+                    response = await client.get(path)
+                    if call >= args.warmup:
+                        cpu_times.append(time.process_time() - start)
+                    if response.status_code not in (200, 404):
+                        sys.exit(f"GET {path} returned {response.status_code}")
+                result["route"] = summary(cpu_times)
+                result["saved_pct"] = round(100 * (1 - result["prepared"]["mean_us"] / result["built"]["mean_us"]), 1)
+                results[case] = result
+                print(f"{case} done", file = sys.stderr)
+    finally:
+        await engine.dispose()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec = "seconds"),
+            "commit": git_commit(),
+            "dialect": engine.dialect.name,
+            "args": {key: value for key, value in vars(args).items() if key != "output"},
+        },
+        "queries": results,
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    # Settings are read when workout_api is imported; cached responses would hide the queries
+    os.environ["DB_URL"] = args.db_url
+    os.environ["RESPONSE_CACHE_BACKEND"] = "none"
+    results = asyncio.run(run(args))
+    output = args.output or os.path.join(
+        os.path.dirname(__file__), "results", f"statements-{results['meta']['commit'] or 'nocommit'}-{datetime.now():%Y%m%d%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok = True)
+    with open(output, "w") as file:
+        json.dump(results, file, indent = 2)
+
+    print(f"{'query':>14} {'built us':>9} {'prepared us':>12} {'saved':>7} {'route us':>9}", file = sys.stderr)
+    for case, result in results["queries"].items():
+        print(
+            f"{case:>14} {result['built']['mean_us']:>9.1f} {result['prepared']['mean_us']:>12.1f} {result['saved_pct']:>6.1f}% {result['route']['mean_us']:>9.1f}",
+            file = sys.stderr
+        )
+    print(f"CPU per call, means of {args.calls} calls; results written to {output}", file = sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
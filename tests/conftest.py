@@ -0,0 +1,98 @@
+import os
+import random
+import tempfile
+
+# Settings are read when workout_api is imported: a scratch SQLite database and no response cache
+os.environ["DB_URL"] = f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'test.sqlite')}"
+os.environ["READ_DB_URLS"] = "[]"
+os.environ["RESPONSE_CACHE_BACKEND"] = "none"
+
+import httpx
+import pytest
+from sqlalchemy import event
+
+from benchmarks.data import cpf_from
+from benchmarks.seed import reset_schema, seed
+from workout_api.configs.database import engine
+from workout_api.contrib.cache import caches
+from workout_api.main import app
+
+SEEDED_ATHLETES = 2000
+
+
+@pytest.fixture(scope = "session")
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture
+async def database():
+    # Empty tables; the reference caches would otherwise keep pk_ids of the previous test's rows
+    await reset_schema()
+    for cache in caches.values():
+        cache.invalidate()
+    yield
+    await engine.dispose()
+
+
+@pytest.fixture
+async def seeded(database):
+    # Same rows on every run: 5 categories, 5 gyms and SEEDED_ATHLETES athletes
+    await seed(random.Random(42), SEEDED_ATHLETES, 5, 5)
+
+
+@pytest.fixture
+async def client(database):
+    async with httpx.AsyncClient(transport = httpx.ASGITransport(app = app), base_url = "http://test") as client:
+        yield client
+
+
+@pytest.fixture
+async def references(client):
+    # The category and gym athlete_payload() refers to
+    assert (await client.post("/categories/", json = {"name": "Scale"})).status_code == 201
+    assert (await client.post("/gyms/", json = {"name": "CT", "address": "Street 1", "owner": "Owner"})).status_code == 201
+
+
+def athlete_payload(cpf: str = cpf_from(1), **fields) -> dict:
+    return {
+        "name": "João",
+        "cpf": cpf,
+        "age": 25,
+        "weight": 75.5,
+        "height": 1.8,
+        "sex": "m",
+        "category": {"name": "Scale"},
+        "gym": {"name": "CT"},
+        **fields,
+    }
+
+
+class StatementRecorder:
+    # Statements sent to the database, with their parameters, while recording
+    def __init__(self) -> None:
+        self.statements: list[tuple[str, object]] = []
+        self.recording = False
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if self.recording:
+            self.statements.append((statement, parameters))
+
+    def __len__(self) -> int:
+        return len(self.statements)
+
+    def __enter__(self) -> "StatementRecorder":
+        self.statements.clear()
+        self.recording = True
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.recording = False
+
+
+@pytest.fixture
+def statements():
+    recorder = StatementRecorder()
+    event.listen(engine.sync_engine, "before_cursor_execute", recorder)
+    yield recorder
+    event.remove(engine.sync_engine, "before_cursor_execute", recorder)
@@ -0,0 +1,40 @@
+import pytest
+
+from benchmarks.data import cpf_from
+from tests.conftest import athlete_payload
+from workout_api.athletes import controller
+from workout_api.athletes.bulk import insert_athletes
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_post_bulk_reports_cpfs_already_in_use(references, client):
+    assert (await client.post("/athletes/", json = athlete_payload(cpf_from(1)))).status_code == 201
+
+    response = await client.post("/athletes/bulk", json = [athlete_payload(cpf_from(1)), athlete_payload(cpf_from(2))])
+    assert response.status_code == 200
+    assert response.json() == {
+        "inserted": 1,
+        "errors": [{"row": 0, "cpf": cpf_from(1), "detail": f"CPF {cpf_from(1)} already in use"}],
+    }
+
+
+async def test_post_bulk_skips_cpfs_taken_after_the_check(references, client, monkeypatch):
+    # Another writer commits one of the CPFs between the IN (...) check and the INSERT
+    async def insert_after_concurrent_post(db_session, rows):
+        assert (await client.post("/athletes/", json = athlete_payload(cpf_from(2), name = "Other"))).status_code == 201
+        return await insert_athletes(db_session, rows)
+
+    monkeypatch.setattr(controller, "insert_athletes", insert_after_concurrent_post)
+    payload = [athlete_payload(cpf_from(1)), athlete_payload(cpf_from(2)), athlete_payload(cpf_from(3))]
+    response = await client.post("/athletes/bulk", json = payload)
+    assert response.status_code == 200
+    assert response.json() == {
+        "inserted": 2,
+        "errors": [{"row": 1, "cpf": cpf_from(2), "detail": f"CPF {cpf_from(2)} already in use"}],
+    }
+
+    names = {athlete["cpf"]: athlete["name"] for athlete in (await client.get("/athletes/")).json()["items"]}
+    assert names == {cpf_from(1): "João", cpf_from(2): "Other", cpf_from(3): "João"}
+    stats = (await client.get("/gyms/stats")).json()
+    assert [gym["athletes"] for gym in stats] == [3]
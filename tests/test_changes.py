@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+from uuid import UUID
+
+import pytest
+from sqlalchemy import update
+
+from benchmarks.data import cpf_from
+from tests.conftest import athlete_payload
+from workout_api.athletes.models import AthleteModel
+from workout_api.configs.database import async_session
+
+pytestmark = pytest.mark.anyio
+
+
+async def post_athlete(client, number: int) -> str:
+    return (await client.post("/athletes/", json = athlete_payload(cpf_from(number)))).json()["id"]
+
+
+async def read_feed(client, token: str = None, size: int = 100, **params) -> tuple[list[tuple[str, str]], str]:
+    # Every change after token, one page of size at a time
+    changes = []
+    while True:
+        page = (await client.get("/athletes/changes", params = {**params, "size": size, **({"token": token} if token else {})})).json()
+        changes += [(item["change"], item["id"]) for item in page["items"]]
+        token = page["next_token"]
+        params = {}
+        if not page["has_more"]:
+            return changes, token
+
+
+async def test_changes_come_in_commit_order_across_pages(references, client):
+    first = await post_athlete(client, 1)
+    second = await post_athlete(client, 2)
+    await client.patch(f"/athletes/{first}", json = {"age": 30})
+    assert (await client.delete(f"/athletes/{second}")).status_code == 204
+
+    changes, _ = await read_feed(client, size = 1)
+    assert changes == [("upsert", first), ("delete", second)]
+
+
+async def test_token_catches_changes_stamped_before_it(references, client):
+    await post_athlete(client, 1)
+    _, token = await read_feed(client)
+
+    # A write stamped by a slow or skewed writer, committed after the client read the feed
+    second = await post_athlete(client, 2)
+    async with async_session() as db_session:
+        await db_session.execute(
+            update(AthleteModel).where(AthleteModel.id == UUID(second)).values(updated_at = datetime.now() - timedelta(hours = 1))
+        )
+        await db_session.commit()
+
+    changes, token = await read_feed(client, token)
+    assert changes == [("upsert", second)]
+    assert (await read_feed(client, token))[0] == []
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+async def test_removal_of_the_latest_change_comes_after_it(references, client, bulk):
+    id = await post_athlete(client, 1)
+    _, token = await read_feed(client)
+
+    if bulk:
+        assert (await client.request("DELETE", "/athletes/bulk", json = {"ids": [id]})).json()["changed"] == 1
+    else:
+        assert (await client.delete(f"/athletes/{id}")).status_code == 204
+    assert (await read_feed(client, token))[0] == [("delete", id)]
+
+
+async def test_since_starts_at_the_first_change_after_it(references, client):
+    await post_athlete(client, 1)
+    since = datetime.now()
+    changes, token = await read_feed(client, since = since.isoformat())
+    assert changes == []
+
+    second = await post_athlete(client, 2)
+    assert (await read_feed(client, token))[0] == [("upsert", second)]
+    assert (await read_feed(client, since = since.isoformat()))[0] == [("upsert", second)]
+
+
+async def test_rejects_a_malformed_token(client):
+    response = await client.get("/athletes/changes", params = {"token": "not-a-token"})
+    assert response.status_code == 400
@@ -0,0 +1,69 @@
+import os
+import random
+
+import anyio
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import text
+
+from benchmarks.seed import add_athletes
+from tests.conftest import SEEDED_ATHLETES
+from workout_api.categories.models import CategoryModel
+from workout_api.configs.database import async_session, engine
+from workout_api.contrib.models import BaseModel
+from workout_api.gyms.models import GymModel
+
+pytestmark = pytest.mark.anyio
+
+# Filter routes and the index each of their statements must search athletes with
+filter_routes = [
+    ("/athletes/age:x?min_age=20&max_age=22", "ix_athletes_age"),
+    ("/athletes/weight:x?min_weight=50&max_weight=52", "ix_athletes_weight"),
+    ("/athletes/height:x?min_height=1.5&max_height=1.52", "ix_athletes_height"),
+    ("/athletes/sex:m", "ix_athletes_sex_age"),
+    ("/athletes/cursor/sex:f", "ix_athletes_sex_age"),
+    ("/athletes/cursor/age:x?min_age=20&max_age=22", "ix_athletes_age"),
+    ("/athletes/search?gym=Gym%201", "ix_athletes_gym_id_created_at"),
+    ("/athletes/search?category=Category%202", "ix_athletes_category_id"),
+]
+
+
+@pytest.fixture
+async def migrated(database):
+    # Schema built by the migrations rather than the models, so a migration that loses an index fails here
+    async with engine.begin() as connection:
+        await connection.run_sync(BaseModel.metadata.drop_all)
+        await connection.execute(text("DROP TABLE IF EXISTS alembic_version"))
+    config = Config()
+    config.set_main_option("script_location", os.path.join(os.path.dirname(os.path.dirname(__file__)), "alembic"))
+    config.set_main_option("sqlalchemy.url", engine.url.render_as_string(hide_password = False))
+    # env.py runs its own event loop
+    await anyio.to_thread.run_sync(command.upgrade, config, "head")
+
+    rng = random.Random(42)
+    async with async_session() as db_session:
+        db_session.add_all([CategoryModel(name = f"Category {i}") for i in range(5)])
+        db_session.add_all([GymModel(name = f"Gym {i}", address = f"Street {i}", owner = f"Owner {i}") for i in range(5)])
+        await db_session.commit()
+    await add_athletes(rng, rng.sample(range(10 ** 9), SEEDED_ATHLETES))
+
+
+async def query_plan(statement: str, parameters) -> list[str]:
+    async with engine.connect() as connection:
+        return [row[-1] for row in (await connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)).all()]
+
+
+@pytest.mark.parametrize("path, index", filter_routes)
+async def test_filter_routes_search_athletes_by_index(migrated, client, statements, path, index):
+    with statements:
+        response = await client.get(path)
+    assert response.status_code == 200
+    assert response.json()["items"]
+
+    athlete_statements = [(statement, parameters) for statement, parameters in statements.statements if "FROM athletes" in statement]
+    assert athlete_statements
+    for statement, parameters in athlete_statements:
+        plan = await query_plan(statement, parameters)
+        assert not any(step.startswith("SCAN athletes") for step in plan), plan
+        assert any(step.startswith("SEARCH athletes USING") and f"INDEX {index} " in step for step in plan), plan
@@ -0,0 +1,43 @@
+from hypothesis import given, strategies as st
+
+from benchmarks.data import cpf_from
+from workout_api.helper.input_validator import InputValidator
+
+valid_cpfs = st.integers(0, 10 ** 9 - 1).map(cpf_from)
+
+
+def formatted(cpf: str) -> str:
+    return f"{cpf[:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:]}"
+
+
+@st.composite
+def wrong_verifier(draw) -> str:
+    cpf = draw(valid_cpfs)
+    position = draw(st.integers(0, 10))
+    digit = draw(st.sampled_from([d for d in "0123456789" if d != cpf[position]]))
+    return cpf[:position] + digit + cpf[position + 1:]
+
+
+cpfs = st.one_of(
+    valid_cpfs,
+    valid_cpfs.map(formatted),
+    wrong_verifier(),
+    wrong_verifier().map(formatted),
+    # Wrong lengths, separators anywhere, and digits of other scripts (str.isdigit accepts them)
+    st.text(alphabet = "0123456789.- ", max_size = 16),
+    st.text(alphabet = st.characters(categories = ["Nd", "P", "Zs"]), min_size = 11, max_size = 14),
+    st.text(max_size = 20),
+)
+
+
+@given(st.lists(cpfs, max_size = 50))
+def test_validate_cpfs_agrees_with_is_valid_cpf(batch):
+    mask, normalized = InputValidator.validate_cpfs(batch)
+    assert mask.tolist() == [InputValidator.is_valid_cpf(cpf) for cpf in batch]
+    assert normalized == ["".join(filter(str.isdigit, cpf)) for cpf in batch]
+
+
+@given(valid_cpfs)
+def test_valid_cpfs_pass_raw_formatted_and_as_int(cpf):
+    mask, _ = InputValidator.validate_cpfs([cpf, formatted(cpf), int(cpf)])
+    assert mask.tolist() == [True, True, len(str(int(cpf))) == 11]
@@ -0,0 +1,55 @@
+import uuid
+
+import pytest
+
+from benchmarks.data import cpf_from
+from tests.conftest import athlete_payload
+
+pytestmark = pytest.mark.anyio
+
+
+async def post_athletes(client, count: int) -> list[str]:
+    return [(await client.post("/athletes/", json = athlete_payload(cpf_from(i + 1)))).json()["id"] for i in range(count)]
+
+
+async def test_patch_bulk_rejects_explicit_nulls_per_item(references, client):
+    first, second = await post_athletes(client, 2)
+    missing = str(uuid.uuid4())
+    response = await client.patch("/athletes/bulk", json = [
+        {"id": first, "age": 33},
+        {"id": second, "weight": None},
+        {"id": missing, "sex": "F"},
+    ])
+    assert response.status_code == 200
+    assert response.json() == {"changed": 1, "results": [
+        {"id": first, "status": "updated", "detail": None},
+        {"id": second, "status": "invalid", "detail": "Weight can't be null"},
+        {"id": missing, "status": "not_found", "detail": f"Athlete not found: {missing}"},
+    ]}
+    assert (await client.get(f"/athletes/{first}")).json()["age"] == 33
+    assert (await client.get(f"/athletes/{second}")).json()["weight"] == 75.5
+
+
+@pytest.mark.parametrize("changes, detail", [
+    ({"sex": "X"}, "Sex X is not valid"),
+    ({"weight": 9999}, "Weight 9999.0 is too high. Max weight is 400"),
+    ({"height": 180}, "Height 180.0 is probably wrong. Max height is 3. Insert height in meters"),
+    ({"name": None}, "Name can't be null"),
+    ({"age": None, "sex": None}, "Age, sex can't be null"),
+])
+async def test_patch_applies_the_bulk_checks(references, client, changes, detail):
+    id, = await post_athletes(client, 1)
+    single = await client.patch(f"/athletes/{id}", json = changes)
+    assert single.status_code == 400
+    assert single.json() == {"detail": detail}
+
+    bulk = await client.patch("/athletes/bulk", json = [{"id": id, **changes}])
+    assert bulk.json()["results"] == [{"id": id, "status": "invalid", "detail": detail}]
+    assert (await client.get(f"/athletes/{id}")).json() == (await client.get("/athletes/")).json()["items"][0]
+
+
+async def test_patch_lower_cases_sex(references, client):
+    first, second = await post_athletes(client, 2)
+    assert (await client.patch(f"/athletes/{first}", json = {"sex": "F"})).json()["sex"] == "f"
+    await client.patch("/athletes/bulk", json = [{"id": second, "sex": "F"}])
+    assert (await client.get(f"/athletes/{second}")).json()["sex"] == "f"
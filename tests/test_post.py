@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from benchmarks.data import cpf_from
+from tests.conftest import athlete_payload
+from workout_api.athletes.batcher import athlete_batcher
+from workout_api.configs.settings import settings
+from workout_api.contrib.response_cache import response_cache
+from workout_api.contrib.timing import RequestTiming, current_timing
+
+pytestmark = pytest.mark.anyio
+
+CONCURRENT_POSTS = 10
+
+
+async def post_concurrently(client, payloads: list[dict]) -> list:
+    return await asyncio.gather(*(client.post("/athletes/", json = payload) for payload in payloads))
+
+
+@pytest.fixture(params = [False, True], ids = ["direct", "batched"])
+async def batching(request, database, monkeypatch):
+    monkeypatch.setattr(settings, "WRITE_BATCHING", request.param)
+    yield
+    # The worker runs on this test's loop, and the queued posts use its engine
+    await athlete_batcher.close()
+
+
+async def test_concurrent_posts_of_one_cpf_insert_once(batching, references, client):
+    responses = await post_concurrently(client, [athlete_payload(name = f"João {i}") for i in range(CONCURRENT_POSTS)])
+
+    statuses = sorted(response.status_code for response in responses)
+    assert statuses == [201] + [303] * (CONCURRENT_POSTS - 1)
+    for response in responses:
+        if response.status_code == 303:
+            assert response.json() == {"detail": f"CPF {cpf_from(1)} already in use"}
+
+    athletes = (await client.get("/athletes/")).json()
+    assert athletes["total"] == 1
+    winner = next(response for response in responses if response.status_code == 201)
+    assert athletes["items"][0]["id"] == winner.json()["id"]
+    assert [gym["athletes"] for gym in (await client.get("/gyms/stats")).json()] == [1]
+
+
+async def test_concurrent_posts_of_different_cpfs_all_insert(batching, references, client):
+    responses = await post_concurrently(client, [athlete_payload(cpf_from(i + 1)) for i in range(CONCURRENT_POSTS)])
+    assert [response.status_code for response in responses] == [201] * CONCURRENT_POSTS
+    assert (await client.get("/athletes/")).json()["total"] == CONCURRENT_POSTS
+
+
+async def test_batched_posts_survive_a_failed_invalidation(references, client, monkeypatch):
+    async def invalidate(namespace: str) -> None:
+        raise ConnectionError("cache down")
+
+    monkeypatch.setattr(settings, "WRITE_BATCHING", True)
+    monkeypatch.setattr(response_cache, "invalidate", invalidate)
+    try:
+        responses = await post_concurrently(client, [athlete_payload(cpf_from(i + 1)) for i in range(CONCURRENT_POSTS)])
+    finally:
+        await athlete_batcher.close()
+    assert [response.status_code for response in responses] == [201] * CONCURRENT_POSTS
+    assert (await client.get("/athletes/")).json()["total"] == CONCURRENT_POSTS
+
+
+async def test_batch_worker_does_not_inherit_the_first_request_context(references, client, monkeypatch):
+    monkeypatch.setattr(settings, "WRITE_BATCHING", True)
+    seen = []
+    insert = athlete_batcher.insert
+
+    async def recording_insert(batch):
+        seen.append(current_timing.get())
+        return await insert(batch)
+
+    monkeypatch.setattr(athlete_batcher, "insert", recording_insert)
+    current_timing.set(RequestTiming())
+    try:
+        assert (await client.post("/athletes/", json = athlete_payload())).status_code == 201
+    finally:
+        await athlete_batcher.close()
+    assert seen == [None]
+
+
+async def test_post_with_unknown_category(references, client):
+    response = await client.post("/athletes/", json = athlete_payload(category = {"name": "Unknown"}))
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Category Unknown not found."}
+
+
+async def test_post_with_unknown_gym(references, client):
+    response = await client.post("/athletes/", json = athlete_payload(gym = {"name": "Unknown"}))
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Gym Unknown not found."}
+
+
+async def test_post_with_unknown_category_and_taken_cpf_reports_the_category(references, client):
+    assert (await client.post("/athletes/", json = athlete_payload())).status_code == 201
+    response = await client.post("/athletes/", json = athlete_payload(category = {"name": "Unknown"}))
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Category Unknown not found."}
+
+
+@pytest.mark.parametrize("fields, detail", [
+    ({"cpf": "12345678900", "category": {"name": "Unknown"}}, "Category Unknown not found."),
+    ({"sex": "X", "gym": {"name": "Unknown"}}, "Gym Unknown not found."),
+    ({"weight": 9999, "category": {"name": "Unknown"}, "gym": {"name": "Unknown"}}, "Category Unknown not found."),
+    ({"cpf": "12345678900", "sex": "X"}, "CPF 12345678900 is not valid"),
+    ({"sex": "X"}, "Sex X is not valid"),
+])
+async def test_post_reports_errors_in_the_original_order(references, client, fields, detail):
+    # Category, then gym, then CPF, sex, weight and height, then a CPF in use
+    response = await client.post("/athletes/", json = athlete_payload(**fields))
+    assert response.status_code == 400
+    assert response.json() == {"detail": detail}
@@ -0,0 +1,67 @@
+import pytest
+
+from tests.conftest import SEEDED_ATHLETES
+
+pytestmark = pytest.mark.anyio
+
+# Offset pages: the page with its category and gym names in one JOINed statement, plus the count
+page_routes = [
+    "/athletes/",
+    "/athletes/?size=5&page=3",
+    "/athletes/name:a",
+    "/athletes/search:Ana",
+    "/athletes/cpf:12",
+    "/athletes/sex:f",
+    "/athletes/age:x?min_age=20&max_age=30",
+    "/athletes/weight:x?min_weight=60&max_weight=90",
+    "/athletes/height:x?min_height=1.6&max_height=1.9",
+    "/athletes/search?gym=Gym%201&sex=m",
+]
+
+# Keyset pages: a single statement, sqlakeyset reads one row past the page instead of counting
+cursor_routes = [
+    "/athletes/cursor/",
+    "/athletes/cursor/sex:m",
+    "/athletes/cursor/age:x?min_age=20&max_age=30",
+    "/athletes/cursor/weight:x?min_weight=60&max_weight=90",
+]
+
+
+async def get(client, statements, path: str):
+    with statements:
+        response = await client.get(path)
+    # Relationships are lazy="raise": a query path missing with_names() fails the request
+    assert response.status_code == 200, response.text
+    return response
+
+
+@pytest.mark.parametrize("path", page_routes)
+async def test_page_routes_issue_page_and_count(seeded, client, statements, path):
+    response = await get(client, statements, path)
+    assert response.json()["items"]
+    assert len(statements) == 2, statements.statements
+
+
+@pytest.mark.parametrize("path", cursor_routes)
+async def test_cursor_routes_issue_one_statement(seeded, client, statements, path):
+    response = await get(client, statements, path)
+    assert response.json()["items"]
+    assert len(statements) == 1, statements.statements
+
+    # The next page as well
+    await get(client, statements, f"{path}{'&' if '?' in path else '?'}cursor={response.json()['next_cursor']}")
+    assert len(statements) == 1, statements.statements
+
+
+async def test_get_by_id_issues_one_statement(seeded, client, statements):
+    id = (await client.get("/athletes/?size=1")).json()["items"][0]["id"]
+    response = await get(client, statements, f"/athletes/{id}")
+    assert response.json()["category"]["name"].startswith("Category ")
+    assert len(statements) == 1, statements.statements
+
+
+async def test_full_page_issues_page_and_count(seeded, client, statements):
+    response = await get(client, statements, "/athletes/?size=100&page=2")
+    assert response.json()["total"] == SEEDED_ATHLETES
+    assert len(response.json()["items"]) == 100
+    assert len(statements) == 2, statements.statements
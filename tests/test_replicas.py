@@ -0,0 +1,70 @@
+import asyncio
+import os
+import tempfile
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import workout_api.configs.database as database_config
+from workout_api.configs.database import ReplicaRouter, engine, read_session
+from workout_api.configs.settings import settings
+
+pytestmark = pytest.mark.anyio
+
+RETRY_AFTER = 0.2
+
+
+@pytest.fixture
+async def replicas(database, monkeypatch):
+    # Two SQLite replicas, then one whose directory doesn't exist, so connecting to it fails;
+    # "recovered" stands in for the unreachable one once it is back
+    directory = tempfile.mkdtemp()
+    engines = {
+        name: create_async_engine(f"sqlite+aiosqlite:///{os.path.join(directory, name, 'replica.sqlite')}")
+        for name in ("first", "second", "unreachable", "recovered")
+    }
+    for name in ("first", "second", "recovered"):
+        os.mkdir(os.path.join(directory, name))
+    monkeypatch.setattr(settings, "READ_REPLICA_RETRY_AFTER", RETRY_AFTER)
+    monkeypatch.setattr(database_config, "read_async_sessions", [
+        sessionmaker(engines[name], class_ = AsyncSession, expire_on_commit = False) for name in ("first", "second", "unreachable")
+    ])
+    monkeypatch.setattr(database_config, "replica_router", ReplicaRouter(3))
+    yield engines
+    for replica in engines.values():
+        await replica.dispose()
+
+
+async def served_by(engines: dict) -> str:
+    names = {replica.sync_engine: name for name, replica in engines.items()}
+    names[engine.sync_engine] = "primary"
+    async with read_session() as session:
+        return names[(await session.connection()).sync_engine]
+
+
+async def test_reads_rotate_and_skip_a_failed_replica(replicas):
+    # The third read fails over to the next replica in line, and the failed one sits out its window
+    assert [await served_by(replicas) for _ in range(6)] == ["first", "second", "first", "first", "second", "first"]
+    assert database_config.replica_router.unhealthy_until[2] > 0
+
+
+async def test_failed_replica_returns_after_its_window(replicas):
+    assert [await served_by(replicas) for _ in range(3)] == ["first", "second", "first"]
+    # Reachable again, but still skipped until the window ends
+    database_config.read_async_sessions[2] = sessionmaker(replicas["recovered"], class_ = AsyncSession, expire_on_commit = False)
+    assert [await served_by(replicas) for _ in range(3)] == ["first", "second", "first"]
+
+    await asyncio.sleep(RETRY_AFTER)
+    assert [await served_by(replicas) for _ in range(3)] == ["first", "second", "recovered"]
+
+
+async def test_reads_fall_back_to_the_primary(replicas, monkeypatch):
+    monkeypatch.setattr(database_config, "read_async_sessions", [database_config.read_async_sessions[2]] * 2)
+    monkeypatch.setattr(database_config, "replica_router", ReplicaRouter(2))
+    assert await served_by(replicas) == "primary"
+    unhealthy_until = list(database_config.replica_router.unhealthy_until)
+    assert all(until > 0 for until in unhealthy_until)
+    # Both replicas sit out their window: the primary serves without trying them again
+    assert await served_by(replicas) == "primary"
+    assert database_config.replica_router.unhealthy_until == unhealthy_until
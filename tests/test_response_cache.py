@@ -0,0 +1,202 @@
+import asyncio
+import logging
+
+import fakeredis.aioredis
+import pytest
+
+from tests.conftest import athlete_payload
+from workout_api.configs.settings import Settings, settings
+from workout_api.contrib.response_cache import MemoryBackend, RedisBackend, response_cache
+from workout_api.contrib.single_flight import SingleFlight
+
+CONCURRENT_GETS = 10
+
+pytestmark = pytest.mark.anyio
+
+
+class UnavailableBackend:
+    # Every call fails, like a RedisBackend whose server is down
+    async def get(self, key: str) -> None:
+        raise ConnectionError("cache down")
+
+    async def set(self, key: str, value: bytes) -> None:
+        raise ConnectionError("cache down")
+
+    async def generation(self, namespace: str) -> int:
+        raise ConnectionError("cache down")
+
+    async def bump(self, namespace: str) -> None:
+        raise ConnectionError("cache down")
+
+
+@pytest.fixture(params = ["memory", "redis"])
+async def backend(request, monkeypatch):
+    if request.param == "memory":
+        backend = MemoryBackend(16)
+    else:
+        backend = RedisBackend(settings.REDIS_URL)
+        backend.client = fakeredis.aioredis.FakeRedis()
+    monkeypatch.setattr(response_cache, "backend", backend)
+    yield backend
+    if request.param == "redis":
+        await backend.client.aclose()
+
+
+@pytest.fixture(params = ["failing", "redis"])
+async def unavailable_backend(request, monkeypatch):
+    # A Redis server nobody listens on, as well as a backend failing every call
+    if request.param == "failing":
+        backend = UnavailableBackend()
+    else:
+        backend = RedisBackend("redis://127.0.0.1:1/0")
+    monkeypatch.setattr(response_cache, "backend", backend)
+    yield backend
+    if request.param == "redis":
+        await backend.client.aclose()
+
+
+def test_cache_is_off_by_default():
+    # "memory" would serve stale bodies from the other workers
+    assert Settings.model_fields["RESPONSE_CACHE_BACKEND"].default == "none"
+    assert Settings.model_fields["REQUEST_COALESCING"].default is False
+
+
+async def test_cached_routes_serve_through_backend_errors(unavailable_backend, references, client, caplog):
+    with caplog.at_level(logging.ERROR, logger = "workout_api.response_cache"):
+        created = await client.post("/athletes/", json = athlete_payload())
+        assert created.status_code == 201
+        id = created.json()["id"]
+
+        response = await client.get(f"/athletes/{id}")
+        assert response.status_code == 200
+        assert response.json()["name"] == "João"
+        assert "ETag" not in response.headers
+
+        # Committed writes answer normally even though the invalidation fails
+        response = await client.patch(f"/athletes/{id}", json = {"name": "Maria"})
+        assert response.status_code == 200
+        assert (await client.get(f"/athletes/{id}")).json()["name"] == "Maria"
+    assert any("invalidation" in record.getMessage() for record in caplog.records)
+    assert any("without it" in record.getMessage() for record in caplog.records)
+
+
+async def test_backend_serves_etags_and_is_invalidated_by_writes(backend, references, client, statements):
+    id = (await client.post("/athletes/", json = athlete_payload())).json()["id"]
+
+    first = await client.get(f"/athletes/{id}")
+    with statements:
+        hit = await client.get(f"/athletes/{id}")
+        not_modified = await client.get(f"/athletes/{id}", headers = {"If-None-Match": first.headers["ETag"]})
+    assert len(statements) == 0
+    assert (hit.content, hit.headers["ETag"]) == (first.content, first.headers["ETag"])
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == first.headers["ETag"]
+
+    await client.patch(f"/athletes/{id}", json = {"name": "Maria"})
+    changed = await client.get(f"/athletes/{id}")
+    assert changed.json()["name"] == "Maria"
+    assert changed.headers["ETag"] != first.headers["ETag"]
+    assert (await client.get(f"/athletes/{id}", headers = {"If-None-Match": first.headers["ETag"]})).status_code == 200
+
+
+async def test_concurrent_identical_gets_share_one_query(references, client, monkeypatch, statements):
+    monkeypatch.setattr(settings, "REQUEST_COALESCING", True)
+    id = (await client.post("/athletes/", json = athlete_payload())).json()["id"]
+
+    with statements:
+        responses = await asyncio.gather(*(client.get(f"/athletes/{id}") for _ in range(CONCURRENT_GETS)))
+    assert [response.status_code for response in responses] == [200] * CONCURRENT_GETS
+    assert len({response.content for response in responses}) == 1
+    assert len(statements) == 1
+
+
+async def test_coalescing_off_queries_per_request(references, client, statements):
+    id = (await client.post("/athletes/", json = athlete_payload())).json()["id"]
+
+    with statements:
+        await asyncio.gather(*(client.get(f"/athletes/{id}") for _ in range(CONCURRENT_GETS)))
+    assert len(statements) == CONCURRENT_GETS
+
+
+class Flight:
+    # A call that runs until released, counting its runs
+    def __init__(self, result: object = None, error: Exception = None) -> None:
+        self.release = asyncio.Event()
+        self.result = result
+        self.error = error
+        self.runs = 0
+
+    async def __call__(self) -> object:
+        self.runs += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+async def settle() -> None:
+    # A few loop iterations, enough for woken tasks to reach their next wait
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def start(flights: SingleFlight, call: Flight, count: int) -> list[asyncio.Task]:
+    tasks = [asyncio.create_task(flights.do("athletes", "/athletes/", call)) for _ in range(count)]
+    await settle()
+    return tasks
+
+
+async def test_single_flight_shares_the_result():
+    flights = SingleFlight()
+    call = Flight(result = "page")
+    tasks = await start(flights, call, CONCURRENT_GETS)
+    call.release.set()
+    results = await asyncio.gather(*tasks)
+    assert call.runs == 1
+    assert sorted(shared for _, shared in results) == [False] + [True] * (CONCURRENT_GETS - 1)
+    assert {result for result, _ in results} == {"page"}
+    assert flights.stats() == {"athletes": {"flights": 1, "shared": CONCURRENT_GETS - 1, "in_flight": 0}}
+
+
+async def test_single_flight_raises_the_error_to_every_waiter():
+    flights = SingleFlight()
+    call = Flight(error = ConnectionError("db down"))
+    tasks = await start(flights, call, CONCURRENT_GETS)
+    call.release.set()
+    results = await asyncio.gather(*tasks, return_exceptions = True)
+    assert call.runs == 1
+    assert all(isinstance(result, ConnectionError) for result in results)
+    assert flights.calls == {}
+
+
+async def test_single_flight_waiters_outlive_a_cancelled_leader():
+    flights = SingleFlight()
+    call = Flight(result = "page")
+    leader, *waiters = await start(flights, call, CONCURRENT_GETS)
+    leader.cancel()
+    await settle()
+    call.release.set()
+
+    results = await asyncio.gather(*waiters)
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    # One waiter runs the call again, the others share its run
+    assert call.runs == 2
+    assert {result for result, _ in results} == {"page"}
+    assert sorted(shared for _, shared in results) == [False] + [True] * (CONCURRENT_GETS - 2)
+
+
+async def test_single_flight_is_not_joined_after_an_invalidation():
+    flights = SingleFlight()
+    stale = Flight(result = "before")
+    tasks = await start(flights, stale, 2)
+
+    # A write commits while the first run is in flight: later callers must not get its result
+    flights.bump("athletes")
+    fresh = Flight(result = "after")
+    fresh.release.set()
+    assert await flights.do("athletes", "/athletes/", fresh) == ("after", False)
+
+    stale.release.set()
+    assert [result for result, _ in await asyncio.gather(*tasks)] == ["before", "before"]
+    assert (stale.runs, fresh.runs) == (1, 1)
@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+from benchmarks.data import cpf_from
+from tests.conftest import athlete_payload
+from workout_api.athletes.serializers import FastPage, page_response
+from workout_api.configs.settings import settings
+
+pytestmark = pytest.mark.anyio
+
+# Every offset-paginated athlete list, rendered by paginate_athletes
+list_paths = [
+    "/athletes/",
+    "/athletes/?size=2&page=2",
+    "/athletes/?size=2&page=9",
+    "/athletes/name:Jo",
+    "/athletes/search:Jo",
+    "/athletes/cpf:1",
+    "/athletes/sex:m",
+    "/athletes/age:x?min_age=21",
+    "/athletes/weight:x?max_weight=100",
+    "/athletes/height:x",
+    "/athletes/search?sort_by=weight&order=desc&size=3",
+    "/athletes/age:x?min_age=99",
+]
+
+
+async def render(client, monkeypatch, fast: bool) -> list[tuple[int, bytes]]:
+    monkeypatch.setattr(settings, "FAST_LIST_SERIALIZATION", fast)
+    return [((response := await client.get(path)).status_code, response.content) for path in list_paths]
+
+
+async def post_athletes(client, weights: list[float]) -> None:
+    for i, weight in enumerate(weights):
+        payload = athlete_payload(cpf_from(i + 1), name = f"João \"{i}\"", age = 20 + i, weight = weight, height = 1.5 + i / 7, sex = "m" if i % 2 else "f")
+        assert (await client.post("/athletes/", json = payload)).status_code == 201
+
+
+async def test_fast_serialization_renders_identical_bodies(references, client, monkeypatch):
+    await post_athletes(client, [70, 70.5, 0.1, 123.456789, 99.99])
+    slow = await render(client, monkeypatch, fast = False)
+    fast = await render(client, monkeypatch, fast = True)
+    for path, slow_response, fast_response in zip(list_paths, slow, fast):
+        assert fast_response == slow_response, path
+    # Every filtered page is compared with rows in it, not only the full list
+    empty = {path for path, (status, body) in zip(list_paths, fast) if status != 200 or not json.loads(body)["items"]}
+    assert empty == {"/athletes/?size=2&page=9", "/athletes/age:x?min_age=99"}
+
+
+async def test_filtered_fast_page_matches_the_model_page(references, client, monkeypatch):
+    await post_athletes(client, [70, 70.5, 0.1, 123.456789, 99.99])
+    path = "/athletes/weight:x?min_weight=70&max_weight=100&size=2&page=2"
+    monkeypatch.setattr(settings, "FAST_LIST_SERIALIZATION", False)
+    slow = await client.get(path)
+    monkeypatch.setattr(settings, "FAST_LIST_SERIALIZATION", True)
+    fast = await client.get(path)
+    assert json.loads(slow.content)["items"]
+    assert (fast.status_code, fast.headers["content-type"], fast.content) == (slow.status_code, slow.headers["content-type"], slow.content)
+
+
+def test_page_response_encodes_a_fast_page():
+    page = FastPage([{"name": "João"}], total = 3, page = 2, size = 1)
+    assert page.total == 3
+    response = page_response(page)
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == {"items": [{"name": "João"}], "total": 3, "page": 2, "size": 1, "pages": 3}
+
+
+async def test_fast_serialization_exponent_format(references, client, monkeypatch):
+    # Floats written with an exponent are the one known difference: pydantic keeps Python's
+    # two-digit exponent (1e-07), orjson doesn't (1e-7). Both parse to the same value.
+    await post_athletes(client, [70, 1e-7])
+    slow = await render(client, monkeypatch, fast = False)
+    fast = await render(client, monkeypatch, fast = True)
+    assert any(b"1e-07" in body for _, body in slow)
+    for path, (slow_status, slow_body), (fast_status, fast_body) in zip(list_paths, slow, fast):
+        assert fast_status == slow_status, path
+        assert fast_body == slow_body.replace(b"1e-07", b"1e-7"), path
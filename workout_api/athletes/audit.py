@@ -0,0 +1,190 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Optional
+
+from sqlalchemy import Row, func, select
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+from sqlalchemy.pool import NullPool
+
+import workout_api.athletes.config as athlete_config
+from workout_api.athletes.models import AthleteModel
+from workout_api.configs.settings import settings
+from workout_api.helper.input_validator import InputValidator
+
+# Reports stored athletes that would not pass the checks done in post, e.g.
+#   python -m workout_api.athletes.audit --output audit.ndjson --workers 4
+
+
+def audit_url() -> str:
+    # Plain short SELECTs, on a replica when there is one; no table or row locks are taken
+    return settings.READ_DB_URLS[0] if settings.READ_DB_URLS else settings.DB_URL
+
+
+def violation(row: Row, check: str, value, detail: str) -> dict:
+    return {"pk_id": row.pk_id, "id": str(row.id), "cpf": row.cpf, "check": check, "value": value, "detail": detail}
+
+
+def row_violations(rows: list[Row]) -> tuple[list[dict], list[list]]:
+    found = []
+    # Rows whose CPF is not stored as 11 digits could collide with another row once normalized
+    unnormalized = []
+    valid_cpfs, normalized = InputValidator.validate_cpfs([row.cpf for row in rows])
+    for row, cpf_valid, cpf in zip(rows, valid_cpfs, normalized):
+        if not cpf_valid:
+            found.append(violation(row, "cpf", row.cpf, f"CPF {row.cpf} is not valid"))
+        if cpf != row.cpf:
+            unnormalized.append([row.pk_id, cpf])
+        if not 0 < row.weight <= athlete_config.max_weight:
+            found.append(violation(row, "weight", row.weight, f"Weight {row.weight} is out of range. Max weight is {athlete_config.max_weight}"))
+        if not 0 < row.height <= athlete_config.max_height:
+            found.append(violation(row, "height", row.height, f"Height {row.height} is out of range. Max height is {athlete_config.max_height}"))
+        if row.sex not in ("m", "f"):
+            found.append(violation(row, "sex", row.sex, f"Sex {row.sex} is not valid"))
+    return found, unnormalized
+
+
+async def run_query(url: str, query: Callable):
+    # Connections can't cross processes or event loops, so every task opens its own
+    engine = create_async_engine(url, poolclass = NullPool)
+    try:
+        async with engine.connect() as connection:
+            return await query(connection)
+    finally:
+        await engine.dispose()
+
+
+def audit_chunk(url: str, start: int, end: int) -> tuple[int, list[dict], list[list]]:
+    async def query(connection: AsyncConnection) -> list[Row]:
+        # Key range served by the primary key index
+        return (await connection.execute(
+            select(AthleteModel.pk_id, AthleteModel.id, AthleteModel.cpf, AthleteModel.weight, AthleteModel.height, AthleteModel.sex)
+            .where(AthleteModel.pk_id >= start, AthleteModel.pk_id < end)
+        )).all()
+
+    rows = asyncio.run(run_query(url, query))
+    return (len(rows), *row_violations(rows))
+
+
+def duplicate_cpfs(url: str, unnormalized: list[list]) -> list[dict]:
+    async def query(connection: AsyncConnection) -> dict[str, list[int]]:
+        pk_ids_by_cpf: dict[str, list[int]] = {}
+        for pk_id, cpf in unnormalized:
+            pk_ids_by_cpf.setdefault(cpf, []).append(pk_id)
+
+        # Stored values repeated, for tables created before the unique constraint
+        repeated = (await connection.execute(
+            select(AthleteModel.cpf).group_by(AthleteModel.cpf).having(func.count() > 1)
+        )).scalars().all()
+        # Rows stored as digits only that other rows turn into once normalized
+        cpfs = list(pk_ids_by_cpf) + list(repeated)
+        for start in range(0, len(cpfs), 1000):
+            for pk_id, cpf in (await connection.execute(
+                select(AthleteModel.pk_id, AthleteModel.cpf).where(AthleteModel.cpf.in_(cpfs[start:start + 1000]))
+            )).all():
+                if pk_id not in pk_ids_by_cpf.setdefault(cpf, []):
+                    pk_ids_by_cpf[cpf].append(pk_id)
+        return pk_ids_by_cpf
+
+    return [
+        {"pk_id": pk_id, "id": None, "cpf": cpf, "check": "duplicate_cpf", "value": cpf, "detail": f"CPF {cpf} is used by rows {sorted(pk_ids)}"}
+        for cpf, pk_ids in asyncio.run(run_query(url, query)).items() if len(pk_ids) > 1
+        for pk_id in sorted(pk_ids)
+    ]
+
+
+def key_range(url: str) -> tuple[Optional[int], Optional[int]]:
+    async def query(connection: AsyncConnection) -> tuple[Optional[int], Optional[int]]:
+        return tuple((await connection.execute(select(func.min(AthleteModel.pk_id), func.max(AthleteModel.pk_id)))).one())
+
+    return asyncio.run(run_query(url, query))
+
+
+def load_checkpoint(path: str, chunk_size: int) -> dict:
+    if not os.path.exists(path):
+        return {"chunk_size": chunk_size, "done": [], "rows": 0, "violations": 0, "unnormalized": []}
+    with open(path) as file:
+        checkpoint = json.load(file)
+    if checkpoint["chunk_size"] != chunk_size:
+        sys.exit(f"{path} was written with --chunk-size {checkpoint['chunk_size']}, resume with it or pass --restart")
+    return checkpoint
+
+
+def save_checkpoint(path: str, checkpoint: dict) -> None:
+    # Written aside and renamed, so an interrupted run never leaves a truncated checkpoint
+    with open(f"{path}.tmp", "w") as file:
+        json.dump(checkpoint, file)
+    os.replace(f"{path}.tmp", path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog = "python -m workout_api.athletes.audit", description = "Report invalid or duplicate athletes as NDJSON")
+    parser.add_argument("--output", default = "audit.ndjson", help = "NDJSON report, appended to when resuming")
+    parser.add_argument("--checkpoint", default = "audit.checkpoint.json", help = "chunks already scanned, to resume an interrupted run")
+    parser.add_argument("--chunk-size", type = int, default = 10000, help = "pk_id range scanned per task")
+    parser.add_argument("--workers", type = int, default = os.cpu_count(), help = "processes in the pool")
+    parser.add_argument("--restart", action = "store_true", help = "discard the checkpoint and the previous report")
+    args = parser.parse_args()
+
+    if args.restart:
+        for path in (args.checkpoint, args.output):
+            if os.path.exists(path):
+                os.remove(path)
+
+    url = audit_url()
+    checkpoint = load_checkpoint(args.checkpoint, args.chunk_size)
+    done = set(checkpoint["done"])
+    low, high = key_range(url)
+    chunks = [] if low is None else [
+        start for start in range(low - low % args.chunk_size, high + 1, args.chunk_size) if start not in done
+    ]
+
+    started = time.perf_counter()
+    rows_scanned = 0
+    with open(args.output, "a") as report:
+        with ProcessPoolExecutor(max_workers = args.workers) as pool:
+            tasks = {pool.submit(audit_chunk, url, start, start + args.chunk_size): start for start in chunks}
+            for task in as_completed(tasks):
+                count, found, unnormalized = task.result()
+                for row in found:
+                    report.write(json.dumps(row) + "\n")
+                report.flush()
+
+                # The report is flushed before the chunk is marked done, resuming never loses violations
+                rows_scanned += count
+                checkpoint["done"].append(tasks[task])
+                checkpoint["rows"] += count
+                checkpoint["violations"] += len(found)
+                checkpoint["unnormalized"] += unnormalized
+                save_checkpoint(args.checkpoint, checkpoint)
+                elapsed = time.perf_counter() - started
+                print(
+                    f"{len(checkpoint['done'])}/{len(done) + len(chunks)} chunks, {checkpoint['rows']} rows, "
+                    f"{rows_scanned / elapsed:.0f} rows/s",
+                    file = sys.stderr
+                )
+
+        if "duplicates" not in checkpoint:
+            duplicates = duplicate_cpfs(url, checkpoint["unnormalized"])
+            for row in duplicates:
+                report.write(json.dumps(row) + "\n")
+            checkpoint["duplicates"] = len(duplicates)
+            checkpoint["violations"] += len(duplicates)
+            save_checkpoint(args.checkpoint, checkpoint)
+
+    elapsed = time.perf_counter() - started
+    print(json.dumps({
+        "rows": checkpoint["rows"],
+        "violations": checkpoint["violations"],
+        "rows_scanned": rows_scanned,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows_scanned / elapsed) if elapsed else None,
+    }), file = sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
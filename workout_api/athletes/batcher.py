@@ -0,0 +1,186 @@
+import asyncio
+import contextvars
+import logging
+import time
+from enum import Enum
+from typing import Optional
+
+from sqlalchemy.future import select
+
+from workout_api.athletes.models import AthleteModel
+from workout_api.athletes.queries import insert_new_athletes
+from workout_api.categories.cache import category_cache
+from workout_api.configs.database import async_session
+from workout_api.configs.settings import settings
+from workout_api.contrib.metrics import Histogram
+from workout_api.contrib.response_cache import response_cache
+from workout_api.gyms.cache import gym_cache
+from workout_api.stats.summary import StatsDelta
+
+ROW_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, float("inf"))
+
+batcher_log = logging.getLogger("workout_api.batcher")
+
+
+class InsertOutcome(str, Enum):
+    inserted = "inserted"
+    category_not_found = "category_not_found"
+    gym_not_found = "gym_not_found"
+    cpf_in_use = "cpf_in_use"
+
+
+class PendingAthlete:
+    def __init__(self, values: dict, category_name: str, gym_name: str) -> None:
+        self.values = values
+        self.category_name = category_name
+        self.gym_name = gym_name
+        self.queued_at = time.perf_counter()
+        self.outcome: asyncio.Future = asyncio.get_running_loop().create_future()
+
+    def resolve(self, outcome: InsertOutcome) -> None:
+        # The caller may have gone away (client disconnect); the row is committed regardless
+        if not self.outcome.done():
+            self.outcome.set_result(outcome)
+
+
+class AthleteBatcher:
+    # Group commit: concurrent posts wait in a queue and are inserted by one task, up to
+    # WRITE_BATCH_SIZE rows per transaction, waiting at most WRITE_BATCH_LINGER_MS for a batch to fill
+    def __init__(self) -> None:
+        self.queue: Optional[asyncio.Queue] = None
+        self.full: Optional[asyncio.Event] = None
+        self.worker: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.rows = 0
+        self.failures = 0
+        self.batch_rows = Histogram(ROW_BUCKETS)
+        self.queue_wait = Histogram()
+        self.flush_seconds = Histogram()
+
+    def start(self) -> None:
+        if self.worker is None or self.worker.done():
+            self.queue = asyncio.Queue(maxsize = settings.WRITE_BATCH_MAX_QUEUE)
+            self.full = asyncio.Event()
+            # Started by whichever post comes first; a fresh context keeps that request's timing out of the worker
+            self.worker = asyncio.get_running_loop().create_task(self.run(), context = contextvars.Context())
+
+    async def submit(self, values: dict, category_name: str, gym_name: str) -> InsertOutcome:
+        self.start()
+        pending = PendingAthlete(values, category_name, gym_name)
+        # Waits when WRITE_BATCH_MAX_QUEUE rows are already queued
+        await self.queue.put(pending)
+        if self.queue.qsize() >= settings.WRITE_BATCH_SIZE:
+            self.full.set()
+        return await pending.outcome
+
+    async def run(self) -> None:
+        linger = settings.WRITE_BATCH_LINGER_MS / 1000
+        while True:
+            batch = [await self.queue.get()]
+            if self.queue.qsize() + 1 < settings.WRITE_BATCH_SIZE and linger > 0:
+                self.full.clear()
+                try:
+                    await asyncio.wait_for(self.full.wait(), linger)
+                except asyncio.TimeoutError:
+                    pass
+            while len(batch) < settings.WRITE_BATCH_SIZE and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            await self.flush(batch)
+            for _ in batch:
+                self.queue.task_done()
+
+    async def flush(self, batch: list[PendingAthlete]) -> None:
+        started = time.perf_counter()
+        for pending in batch:
+            self.queue_wait.observe(started - pending.queued_at)
+        inserted = False
+        try:
+            inserted = await self.insert(batch)
+        except Exception as e:
+            # Nothing of the batch was committed, every caller gets the error
+            self.failures += 1
+            for pending in batch:
+                if not pending.outcome.done():
+                    pending.outcome.set_exception(e)
+        if inserted:
+            # Every caller already has its outcome; the rows are committed whatever happens to the cache
+            try:
+                await response_cache.invalidate("athletes")
+            except Exception:
+                batcher_log.exception("Response cache invalidation after a batch failed")
+        self.batches += 1
+        self.rows += len(batch)
+        self.batch_rows.observe(len(batch))
+        self.flush_seconds.observe(time.perf_counter() - started)
+
+    async def insert(self, batch: list[PendingAthlete]) -> bool:
+        async with async_session() as db_session:
+            categories = await category_cache.pk_ids_by_name(db_session, {pending.category_name for pending in batch})
+            gyms = await gym_cache.pk_ids_by_name(db_session, {pending.gym_name for pending in batch})
+
+            # First post of a CPF in the batch wins, like the first commit would without batching.
+            # Callers only hear back once the batch is committed.
+            rejected: list[tuple[PendingAthlete, InsertOutcome]] = []
+            rows: dict[str, tuple[PendingAthlete, dict]] = {}
+            for pending in batch:
+                if pending.category_name not in categories:
+                    rejected.append((pending, InsertOutcome.category_not_found))
+                elif pending.gym_name not in gyms:
+                    rejected.append((pending, InsertOutcome.gym_not_found))
+                elif pending.values["cpf"] in rows:
+                    rejected.append((pending, InsertOutcome.cpf_in_use))
+                else:
+                    rows[pending.values["cpf"]] = (pending, {
+                        **pending.values,
+                        "category_id": categories[pending.category_name],
+                        "gym_id": gyms[pending.gym_name],
+                    })
+            if rows and db_session.bind.dialect.name not in ("postgresql", "sqlite"):
+                # No ON CONFLICT DO NOTHING: CPFs already stored are left out beforehand
+                for cpf in (await db_session.execute(select(AthleteModel.cpf).where(AthleteModel.cpf.in_(rows)))).scalars():
+                    rejected.append((rows.pop(cpf)[0], InsertOutcome.cpf_in_use))
+
+            # CPFs already stored are skipped by the INSERT and reported per caller
+            values = [row for _, row in rows.values()]
+            inserted = set()
+            for start in range(0, len(values), settings.BULK_INSERT_CHUNK_SIZE):
+                inserted.update((await db_session.execute(
+                    insert_new_athletes(db_session.bind.dialect.name, values[start:start + settings.BULK_INSERT_CHUNK_SIZE])
+                )).scalars())
+
+            stats_delta = StatsDelta()
+            for cpf in inserted:
+                stats_delta.add(rows[cpf][1])
+            await stats_delta.apply(db_session)
+            await db_session.commit()
+
+        for pending, outcome in rejected:
+            pending.resolve(outcome)
+        for cpf, (pending, _) in rows.items():
+            pending.resolve(InsertOutcome.inserted if cpf in inserted else InsertOutcome.cpf_in_use)
+        return bool(inserted)
+
+    async def close(self) -> None:
+        # Posts already queued are committed before shutdown
+        if self.worker is None or self.worker.done():
+            return
+        await self.queue.join()
+        self.worker.cancel()
+        try:
+            await self.worker
+        except asyncio.CancelledError:
+            pass
+
+    def snapshot(self) -> dict:
+        return {
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+            "max_queue": settings.WRITE_BATCH_MAX_QUEUE,
+            "batches": self.batches,
+            "rows": self.rows,
+            "failures": self.failures,
+            "batch_rows": self.batch_rows.snapshot(),
+            "queue_wait_seconds": self.queue_wait.snapshot(),
+            "flush_seconds": self.flush_seconds.snapshot(),
+        }
+
+athlete_batcher = AthleteBatcher()
@@ -0,0 +1,43 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from workout_api.athletes.models import AthleteModel
+from workout_api.athletes.queries import insert_new_athletes
+from workout_api.athletes.txid import change_txid
+from workout_api.configs.settings import settings
+
+athlete_columns = ["id", "name", "cpf", "age", "weight", "height", "sex", "created_at", "updated_at", "category_id", "gym_id"]
+
+
+async def insert_athletes(db_session: AsyncSession, rows: list[dict]) -> set[str]:
+    # Returns the CPFs inserted; rows whose CPF was taken in the meantime (e.g. by a concurrent post) are skipped
+    connection = await db_session.connection()
+
+    if connection.dialect.driver == "asyncpg":
+        # COPY streams every row in a single round trip, into a scratch table so the CPF conflicts can be skipped
+        columns = ", ".join(athlete_columns)
+        await connection.execute(text(
+            f"CREATE TEMP TABLE athletes_incoming AS SELECT {columns} FROM {AthleteModel.__tablename__} WITH NO DATA"
+        ))
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            "athletes_incoming",
+            records = [tuple(row[column] for column in athlete_columns) for row in rows],
+            columns = athlete_columns
+        )
+        # Raw SQL skips the column defaults, so the change feed key is added here
+        key = change_txid().compile(dialect = connection.dialect)
+        inserted = set((await connection.execute(text(
+            f"INSERT INTO {AthleteModel.__tablename__} ({columns}, change_txid) SELECT {columns}, {key} FROM athletes_incoming "
+            "ON CONFLICT (cpf) DO NOTHING RETURNING cpf"
+        ))).scalars())
+        await connection.execute(text("DROP TABLE athletes_incoming"))
+        return inserted
+
+    # Multi-row INSERT ... VALUES, chunked to stay under the driver's bind parameter limit
+    inserted = set()
+    for start in range(0, len(rows), settings.BULK_INSERT_CHUNK_SIZE):
+        inserted.update((await db_session.execute(
+            insert_new_athletes(connection.dialect.name, rows[start:start + settings.BULK_INSERT_CHUNK_SIZE])
+        )).scalars())
+    return inserted
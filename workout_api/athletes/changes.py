@@ -0,0 +1,61 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from workout_api.athletes.models import AthleteModel
+from workout_api.athletes.queries import athlete_changes, first_change_since, with_names
+from workout_api.athletes.schemas import AthleteChange, AthleteChangesOut, AthleteChangeType
+
+# A token is the (change_txid, id) key of the last change a client has seen
+ChangeKey = tuple[int, UUID]
+
+
+def encode_token(key: ChangeKey) -> str:
+    return base64.urlsafe_b64encode(json.dumps([key[0], key[1].hex]).encode()).decode()
+
+
+def decode_token(token: str) -> ChangeKey:
+    # ValueError for anything that is not a token from encode_token
+    try:
+        change_txid, id = json.loads(base64.urlsafe_b64decode(token.encode()))
+        return int(change_txid), UUID(hex = id)
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid token: {token}") from e
+
+
+async def key_since(db_session: AsyncSession, since: datetime) -> ChangeKey:
+    # Pages from this key on hold every change made since then, and may hold some made before
+    return (await db_session.scalar(first_change_since(since)), UUID(int = 0))
+
+
+async def changes_page(db_session: AsyncSession, after: Optional[ChangeKey], size: int) -> AthleteChangesOut:
+    # Only changes of finished transactions are served, so none can later commit behind the token the client is given
+    keys = (await db_session.execute(athlete_changes(after, size + 1))).all()
+    has_more = len(keys) > size
+    keys = keys[:size]
+
+    # Current values of the edited athletes, with the category and gym names, in one more query
+    edited = [key.id for key in keys if not key.deleted]
+    athletes = {
+        athlete.id: athlete for athlete in (
+            await db_session.execute(with_names(select(AthleteModel).where(AthleteModel.id.in_(edited))))
+        ).scalars()
+    } if edited else {}
+
+    items = [
+        AthleteChange(id = key.id, change = AthleteChangeType.delete, changed_at = key.changed_at) if key.deleted
+        else AthleteChange(id = key.id, change = AthleteChangeType.upsert, changed_at = key.changed_at, athlete = athletes.get(key.id))
+        for key in keys
+    ]
+    if keys:
+        after = (keys[-1].change_txid, keys[-1].id)
+    return AthleteChangesOut(
+        items = items,
+        next_token = encode_token(after or (0, UUID(int = 0))),
+        has_more = has_more,
+    )
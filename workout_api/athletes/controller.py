@@ -1,31 +1,39 @@
-from typing import List
-from enum import Enum
-from fastapi import APIRouter, Body, HTTPException, status
-from fastapi_pagination import Page, add_pagination, paginate
-from fastapi_pagination.utils import disable_installed_extensions_check
-from pydantic import UUID4
-from uuid import uuid4
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from fastapi_pagination import Page
+from pydantic import UUID4, ValidationError
+from uuid import UUID, uuid4
 from datetime import datetime
+from typing import Optional
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.future import select
-from workout_api.athletes.schemas import AthleteIn, AthleteOut, AthleteUpdate
-from workout_api.athletes.models import AthleteModel
+from workout_api.athletes.batcher import InsertOutcome, athlete_batcher
+from workout_api.athletes.bulk import insert_athletes
+from workout_api.athletes.changes import changes_page, decode_token, key_since
+from workout_api.athletes.export import csv_export, ndjson_export
+from workout_api.athletes.schemas import AthleteBulkChangeOut, AthleteChangesOut, AthleteBulkDelete, AthleteBulkError, AthleteBulkOut, AthleteBulkResult, AthleteBulkStatus, AthleteBulkUpdate, AthleteIn, AthleteOut, AthleteSearch, AthleteSortField, AthleteUpdate, ExportFormat, Sex, SortOrder
+from workout_api.athletes.models import AthleteModel, AthleteTombstoneModel
+from workout_api.athletes.queries import all_athletes, athlete_age_page, athlete_by_id, athlete_cpf_page, athlete_filters, athlete_height_page, athlete_model_by_id, athlete_name_page, athlete_rows, athlete_sex_page, athlete_weight_page, athletes_by_age, athletes_by_sex, athletes_by_weight, delete_athletes, insert_athlete, insert_diagnosis, keyset_order, search_athletes, update_athletes, with_names
+from workout_api.athletes.serializers import FastPage, page_response, paginate_athletes
+from workout_api.athletes.txid import change_txid
+from workout_api.athletes.validation import athlete_input_error, athlete_update_error
 import workout_api.athletes.config as athlete_config
 
-from workout_api.categories.models import CategoryModel
-from workout_api.categories.schemas import CategoryOut
-from workout_api.contrib.dependencies import DatabaseDependency
-from workout_api.gyms.models import GymModel
-from workout_api.gyms.schemas import GymAthlete
-
+from workout_api.categories.cache import category_cache
+from workout_api.contrib.dependencies import DatabaseDependency, ReadDatabaseDependency
+from workout_api.contrib.pagination import CursorPage, paginate
+from workout_api.contrib.response_cache import CachedRoute, cached, response_cache
+from workout_api.contrib.search import ranked_name_search
+from workout_api.configs.settings import settings
+from workout_api.contrib.streaming import json_rows, ndjson_stream
+from workout_api.gyms.cache import gym_cache
 from workout_api.helper.input_validator import InputValidator
-
-class Sex(str, Enum):
-    male = "m"
-    female = "f"
+from workout_api.stats.summary import StatsDelta, athlete_stats_columns, athlete_stats_values, locked_for_stats
 
 
 
-router = APIRouter()
+router = APIRouter(route_class = CachedRoute)
 
 @router.post(
         path = '/',
@@ -40,71 +48,346 @@ async def post(
 ) -> AthleteOut:
     
     category_name = athlete_in.category.name
-    category: CategoryOut = (await db_session.execute(select(CategoryModel).filter_by(name = category_name))).scalars().first()
-    # Check if category exists
-    if not category:
-        raise HTTPException(
-            status_code = status.HTTP_400_BAD_REQUEST,
-            detail = f"Category {category_name} not found."
-        )
-    # Check if gym exists
     gym_name = athlete_in.gym.name
-    gym: GymModel = (await db_session.execute(select(GymModel).filter_by(name = gym_name))).scalars().first()
-    if not gym:
+    # Check CPF, sex, weight and height
+    error = athlete_input_error(athlete_in)
+    if error:
+        # A missing category or gym is still reported first; only invalid posts pay for this lookup
+        category_id, gym_id, _ = (await db_session.execute(insert_diagnosis(category_name, gym_name, athlete_in.cpf))).one()
+        if category_id is None:
+            error = f"Category {category_name} not found."
+        elif gym_id is None:
+            error = f"Gym {gym_name} not found."
         raise HTTPException(
             status_code = status.HTTP_400_BAD_REQUEST,
-            detail = f"Gym {gym_name} not found."
+            detail = error
         )
-    # Check if CPF is valid
-    if not InputValidator.is_valid_cpf(athlete_in.cpf):
+    # Save the sex in lower case
+    athlete_in.sex = athlete_in.sex.lower()
+
+    athlete_out = AthleteOut(id=uuid4(), created_at = datetime.now() ,**athlete_in.model_dump())
+    values = {**athlete_out.model_dump(exclude={"category", "gym"}), "updated_at": athlete_out.created_at}
+    if settings.WRITE_BATCHING:
+        # Committed together with the other posts queued meanwhile
+        try:
+            outcome = await athlete_batcher.submit(values, category_name, gym_name)
+        except Exception:
+            raise HTTPException(
+                status_code = status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Error inserting data in DB"
+            )
+        if outcome == InsertOutcome.category_not_found:
+            raise HTTPException(
+                status_code = status.HTTP_400_BAD_REQUEST,
+                detail = f"Category {category_name} not found."
+            )
+        if outcome == InsertOutcome.gym_not_found:
+            raise HTTPException(
+                status_code = status.HTTP_400_BAD_REQUEST,
+                detail = f"Gym {gym_name} not found."
+            )
+        if outcome == InsertOutcome.cpf_in_use:
+            raise HTTPException(
+                status_code = status.HTTP_303_SEE_OTHER,
+                detail=f"CPF {athlete_in.cpf} already in use"
+            )
+        return athlete_out
+
+    # One round trip: category and gym looked up by name, CPF conflicts skipped
+    try:
+        inserted = (await db_session.execute(insert_athlete(
+            db_session.bind.dialect.name, values, category_name, gym_name
+        ))).first()
+        if inserted is not None:
+            stats_delta = StatsDelta()
+            stats_delta.add({**values, **inserted._mapping})
+            await stats_delta.apply(db_session)
+            await db_session.commit()
+            await response_cache.invalidate("athletes")
+
+    except IntegrityError:
+        # Dialects without ON CONFLICT report the CPF conflict here
+        await db_session.rollback()
+        inserted = None
+
+    except Exception:
         raise HTTPException(
-            status_code = status.HTTP_400_BAD_REQUEST,
-            detail=f"CPF {athlete_in.cpf} is not valid"
+            status_code = status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error inserting data in DB"
         )
-    # Check if sex is either M or F
-    if not InputValidator.is_input_in_list(input = athlete_in.sex.lower(), options = ["m", "f"]):
+
+    if inserted is None:
+        category_id, gym_id, cpf_in_use = (await db_session.execute(insert_diagnosis(category_name, gym_name, athlete_in.cpf))).one()
+        # Check if category exists
+        if category_id is None:
+            raise HTTPException(
+                status_code = status.HTTP_400_BAD_REQUEST,
+                detail = f"Category {category_name} not found."
+            )
+        # Check if gym exists
+        if gym_id is None:
+            raise HTTPException(
+                status_code = status.HTTP_400_BAD_REQUEST,
+                detail = f"Gym {gym_name} not found."
+            )
+        # Check if CPF is already in use
+        if cpf_in_use:
+            raise HTTPException(
+                status_code = status.HTTP_303_SEE_OTHER,
+                detail=f"CPF {athlete_in.cpf} already in use"
+            )
         raise HTTPException(
-            status_code = status.HTTP_400_BAD_REQUEST,
-            detail=f"Sex {athlete_in.sex} is not valid"
+            status_code = status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error inserting data in DB"
         )
-    # Save the sex in lower case
-    athlete_in.sex = athlete_in.sex.lower()
-    
-    # Check if weight is within the upper limit
-    if athlete_in.weight > athlete_config.max_weight:
+    return athlete_out
+
+@router.post(
+        path = '/bulk',
+        summary = "Add many athletes at once",
+        status_code = status.HTTP_200_OK,
+        response_model = AthleteBulkOut,
+        openapi_extra = {"requestBody": {"required": True, "content": {
+            "application/json": {"schema": {"type": "array", "items": {"$ref": "#/components/schemas/AthleteIn"}}},
+            "application/x-ndjson": {"schema": {"$ref": "#/components/schemas/AthleteIn"}},
+        }}},
+)
+
+async def post_bulk(request: Request, db_session: DatabaseDependency) -> AthleteBulkOut:
+    errors: list[AthleteBulkError] = []
+    parsed: dict[int, AthleteIn] = {}
+    athletes: dict[int, AthleteIn] = {}
+    cpfs_in_request = set()
+
+    # Validate every row before touching the database
+    row = 0
+    async for data in json_rows(request):
+        if row >= settings.BULK_MAX_ROWS:
+            raise HTTPException(
+                status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail = f"At most {settings.BULK_MAX_ROWS} athletes per request"
+            )
+        try:
+            athlete_in = AthleteIn.model_validate_json(data) if isinstance(data, bytes) else AthleteIn.model_validate(data)
+        except ValidationError as e:
+            detail = "; ".join(
+                f"{'.'.join(map(str, error['loc']))}: {error['msg']}" if error['loc'] else error['msg']
+                for error in e.errors()
+            )
+            errors.append(AthleteBulkError(row = row, detail = detail))
+        else:
+            parsed[row] = athlete_in
+        row += 1
+
+    # Every CPF in the request is checked in one vectorized pass
+    valid_cpfs, _ = InputValidator.validate_cpfs([athlete_in.cpf for athlete_in in parsed.values()])
+    for (row, athlete_in), cpf_valid in zip(parsed.items(), valid_cpfs):
+        error = athlete_input_error(athlete_in, cpf_valid = bool(cpf_valid))
+        if not error and athlete_in.cpf in cpfs_in_request:
+            error = f"CPF {athlete_in.cpf} repeated in this request"
+        if error:
+            errors.append(AthleteBulkError(row = row, cpf = athlete_in.cpf, detail = error))
+        else:
+            cpfs_in_request.add(athlete_in.cpf)
+            athletes[row] = athlete_in
+
+    # At most one query each for the referenced categories, gyms and already used CPFs
+    categories = await category_cache.pk_ids_by_name(db_session, {athlete_in.category.name for athlete_in in athletes.values()})
+    gyms = await gym_cache.pk_ids_by_name(db_session, {athlete_in.gym.name for athlete_in in athletes.values()})
+    cpfs_in_use = set((await db_session.execute(
+        select(AthleteModel.cpf).where(AthleteModel.cpf.in_(cpfs_in_request))
+    )).scalars())
+
+    created_at = datetime.now()
+    rows = []
+    rows_by_cpf: dict[str, int] = {}
+    for row, athlete_in in athletes.items():
+        if athlete_in.category.name not in categories:
+            errors.append(AthleteBulkError(row = row, cpf = athlete_in.cpf, detail = f"Category {athlete_in.category.name} not found."))
+        elif athlete_in.gym.name not in gyms:
+            errors.append(AthleteBulkError(row = row, cpf = athlete_in.cpf, detail = f"Gym {athlete_in.gym.name} not found."))
+        elif athlete_in.cpf in cpfs_in_use:
+            errors.append(AthleteBulkError(row = row, cpf = athlete_in.cpf, detail = f"CPF {athlete_in.cpf} already in use"))
+        else:
+            rows_by_cpf[athlete_in.cpf] = row
+            rows.append({
+                **athlete_in.model_dump(exclude = {"category", "gym"}),
+                "id": uuid4(),
+                "sex": athlete_in.sex.lower(),
+                "created_at": created_at,
+                "updated_at": created_at,
+                "category_id": categories[athlete_in.category.name],
+                "gym_id": gyms[athlete_in.gym.name],
+            })
+
+    inserted = set()
+    if rows:
+        try:
+            inserted = await insert_athletes(db_session, rows)
+            stats_delta = StatsDelta()
+            for values in rows:
+                if values["cpf"] in inserted:
+                    stats_delta.add(values)
+            await stats_delta.apply(db_session)
+            await db_session.commit()
+            await response_cache.invalidate("athletes")
+
+        except Exception:
+            raise HTTPException(
+                status_code = status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Error inserting data in DB"
+            )
+
+    # CPFs taken by another writer after the check above were skipped by the INSERT
+    for cpf, row in rows_by_cpf.items():
+        if cpf not in inserted:
+            errors.append(AthleteBulkError(row = row, cpf = cpf, detail = f"CPF {cpf} already in use"))
+    return AthleteBulkOut(inserted = len(inserted), errors = sorted(errors, key = lambda error: error.row))
+
+@router.patch(
+        path = '/bulk',
+        summary = "Edit many athletes at once",
+        status_code = status.HTTP_200_OK,
+        response_model = AthleteBulkChangeOut,
+)
+
+async def patch_bulk(
+    db_session: DatabaseDependency,
+    athlete_updates: list[AthleteBulkUpdate] = Body(...)
+) -> AthleteBulkChangeOut:
+    if len(athlete_updates) > settings.BULK_MAX_ROWS:
         raise HTTPException(
-            status_code = status.HTTP_400_BAD_REQUEST,
-            detail=f"Weight {athlete_in.weight} is too high. Max weight is {athlete_config.max_weight}"
+            status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail = f"At most {settings.BULK_MAX_ROWS} athletes per request"
         )
-    
-    # Check if weight is within the upper limit
-    if athlete_in.height > athlete_config.max_height:
+
+    # Outcome of each item in request order; None until the UPDATE says whether the athlete exists
+    results: list[Optional[AthleteBulkResult]] = []
+    changes: dict[UUID4, dict] = {}
+    for athlete_update in athlete_updates:
+        values = athlete_update.model_dump(exclude_unset = True, exclude = {"id"})
+        error = athlete_update_error(athlete_update)
+        if not error and not values:
+            error = "Nothing to update"
+        if not error and athlete_update.id in changes:
+            error = f"Athlete {athlete_update.id} repeated in this request"
+        if error:
+            results.append(AthleteBulkResult(id = athlete_update.id, status = AthleteBulkStatus.invalid, detail = error))
+            continue
+        if "sex" in values:
+            values["sex"] = values["sex"].lower()
+        changes[athlete_update.id] = values
+        results.append(None)
+
+    # Set-based UPDATE, one statement per chunk, all in one transaction
+    ids = list(changes)
+    updated = set()
+    updated_at = datetime.now()
+    stats_delta = StatsDelta()
+    try:
+        for start in range(0, len(ids), settings.BULK_INSERT_CHUNK_SIZE):
+            chunk = {id: changes[id] for id in ids[start:start + settings.BULK_INSERT_CHUNK_SIZE]}
+            if settings.STATS_SUMMARY:
+                # Values before the UPDATE, to take out of the summaries
+                for row in (await db_session.execute(
+                    locked_for_stats(select(AthleteModel.id, *athlete_stats_columns).where(AthleteModel.id.in_(chunk)))
+                )).all():
+                    stats_delta.remove(row._mapping)
+                    stats_delta.add({**row._mapping, **chunk[row.id]})
+            updated.update((await db_session.execute(
+                update_athletes(chunk, updated_at), execution_options = {"synchronize_session": False}
+            )).scalars())
+        await stats_delta.apply(db_session)
+        await db_session.commit()
+        await response_cache.invalidate("athletes")
+
+    except Exception:
         raise HTTPException(
-            status_code = status.HTTP_400_BAD_REQUEST,
-            detail=f"Height {athlete_in.height} is probably wrong. Max height is {athlete_config.max_height}. Insert height in meters"
+            status_code = status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error updating data in DB"
         )
 
-    # Check if Name is already in use
-    if ((await db_session.execute(select(AthleteModel).filter_by(cpf = athlete_in.cpf))).scalars().first()):
+    for index, athlete_update in enumerate(athlete_updates):
+        if results[index] is None and athlete_update.id in updated:
+            results[index] = AthleteBulkResult(id = athlete_update.id, status = AthleteBulkStatus.updated)
+        elif results[index] is None:
+            results[index] = AthleteBulkResult(id = athlete_update.id, status = AthleteBulkStatus.not_found, detail = f"Athlete not found: {athlete_update.id}")
+    return AthleteBulkChangeOut(changed = len(updated), results = results)
+
+@router.delete(
+        path = '/bulk',
+        summary = "Remove many athletes at once, by id or by filter",
+        status_code = status.HTTP_200_OK,
+        response_model = AthleteBulkChangeOut,
+)
+
+async def delete_bulk(
+    db_session: DatabaseDependency,
+    athlete_delete: AthleteBulkDelete = Body(...)
+) -> AthleteBulkChangeOut:
+    if (athlete_delete.ids is None) == (athlete_delete.filter is None):
         raise HTTPException(
-            status_code = status.HTTP_303_SEE_OTHER,
-            detail=f"CPF {athlete_in.cpf} already in use"
+            status_code = status.HTTP_400_BAD_REQUEST,
+            detail = "Send either ids or filter"
         )
 
+    if athlete_delete.filter is not None:
+        filters = athlete_filters(athlete_delete.filter)
+        if not filters:
+            raise HTTPException(
+                status_code = status.HTTP_400_BAD_REQUEST,
+                detail = "The filter needs at least one field"
+            )
+        statements = [delete_athletes(*filters)]
+    else:
+        if len(athlete_delete.ids) > settings.BULK_MAX_ROWS:
+            raise HTTPException(
+                status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail = f"At most {settings.BULK_MAX_ROWS} athletes per request"
+            )
+        statements = [
+            delete_athletes(AthleteModel.id.in_(athlete_delete.ids[start:start + settings.BULK_INSERT_CHUNK_SIZE]))
+            for start in range(0, len(athlete_delete.ids), settings.BULK_INSERT_CHUNK_SIZE)
+        ]
+
+    # Set-based DELETE ... RETURNING, all in one transaction
+    deleted = []
+    deleted_at = datetime.now()
+    stats_delta = StatsDelta()
     try:
-        athlete_out = AthleteOut(id=uuid4(), created_at = datetime.now() ,**athlete_in.model_dump())
-        athlete_model = AthleteModel(**athlete_out.model_dump(exclude={"category", "gym"}))
-        athlete_model.category_id = category.pk_id
-        athlete_model.gym_id = gym.pk_id
-        db_session.add(athlete_model)
+        for statement in statements:
+            rows = (await db_session.execute(
+                statement.returning(*athlete_stats_columns, AthleteModel.change_txid), execution_options = {"synchronize_session": False}
+            )).all()
+            deleted += [row.id for row in rows]
+            for row in rows:
+                stats_delta.remove(row._mapping)
+            # Tombstones for the change feed, keyed above the rows they replace
+            if rows:
+                await db_session.execute(
+                    insert(AthleteTombstoneModel.__table__).values(change_txid = change_txid(max(row.change_txid for row in rows))),
+                    [{"id": row.id, "deleted_at": deleted_at} for row in rows]
+                )
+        await stats_delta.apply(db_session)
         await db_session.commit()
-    
+        await response_cache.invalidate("athletes")
+
     except Exception:
         raise HTTPException(
             status_code = status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error inserting data in DB"
+            detail="Error deleting data in DB"
         )
-    return athlete_out
+
+    if athlete_delete.filter is not None:
+        results = [AthleteBulkResult(id = id, status = AthleteBulkStatus.deleted) for id in deleted]
+    else:
+        deleted_ids = set(deleted)
+        results = [
+            AthleteBulkResult(id = id, status = AthleteBulkStatus.deleted) if id in deleted_ids
+            else AthleteBulkResult(id = id, status = AthleteBulkStatus.not_found, detail = f"Athlete not found: {id}")
+            for id in athlete_delete.ids
+        ]
+    return AthleteBulkChangeOut(changed = len(deleted), results = results)
 
 @router.get(
         path = '/',
@@ -113,12 +396,9 @@ async def post(
         response_model = Page[AthleteOut]
 )
 
-async def get_all_athletes(db_session: DatabaseDependency) -> Page[AthleteOut]:
-    athletes: List[AthleteOut] = (await db_session.execute(select(AthleteModel))).scalars().all()
-    #print(athletes)
-    #print(type(athletes))
-    #return ([AthleteOut.model_validate(athlete) for athlete in athletes])
-    return paginate(athletes)
+async def get_all_athletes(db_session: ReadDatabaseDependency) -> Page[AthleteOut]:
+    query = all_athletes().order_by(AthleteModel.pk_id)
+    return page_response(await paginate_athletes(db_session, query, approximate_count_table = AthleteModel.__tablename__))
 
 @router.get(
         path = '/name:{name}',
@@ -126,18 +406,36 @@ async def get_all_athletes(db_session: DatabaseDependency) -> Page[AthleteOut]:
         status_code = status.HTTP_200_OK,
         response_model = Page[AthleteOut]
 )
+@cached("athletes")
 
-async def get_athlete_by_name(name: str, db_session: DatabaseDependency) -> Page[AthleteOut]:
+async def get_athlete_by_name(name: str, db_session: ReadDatabaseDependency) -> Page[AthleteOut]:
     
-    query = select(AthleteModel).where(AthleteModel.name.contains(name))
-    results = await db_session.execute(query)
-    athlete: List[AthleteOut] = results.scalars().all()
+    athlete: Page[AthleteOut] | FastPage = await paginate_athletes(db_session, athlete_name_page, values = {"name": name})
 
-    
-    if not athlete:
+    if not athlete.total:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail = f"Athlete not found by name: {name}")
+
+    return page_response(athlete)
+
+@router.get(
+        path = '/search:{name}',
+        summary = "Search Athletes by name, best matches first",
+        status_code = status.HTTP_200_OK,
+        response_model = Page[AthleteOut]
+)
+
+async def search_athlete_by_name(name: str, db_session: ReadDatabaseDependency, stream: bool = False) -> Page[AthleteOut]:
+
+    query = ranked_name_search(all_athletes(), AthleteModel.name, AthleteModel.pk_id, name, db_session.bind.dialect.name)
+    if stream:
+        return StreamingResponse(ndjson_stream(with_names(query), AthleteOut), media_type = "application/x-ndjson")
+
+    athlete: Page[AthleteOut] | FastPage = await paginate_athletes(db_session, query)
+
+    if not athlete.total:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail = f"Athlete not found by name: {name}")
 
-    return paginate(athlete)
+    return page_response(athlete)
 
 @router.get(
         path = '/cpf:{cpf}',
@@ -146,17 +444,14 @@ async def get_athlete_by_name(name: str, db_session: DatabaseDependency) -> Page
         response_model = Page[AthleteOut]
 )
 
-async def get_athlete_by_cpf(cpf: str, db_session: DatabaseDependency) -> Page[AthleteOut]:
+async def get_athlete_by_cpf(cpf: str, db_session: ReadDatabaseDependency) -> Page[AthleteOut]:
     
-    query = select(AthleteModel).where(AthleteModel.cpf.contains(cpf))
-    results = await db_session.execute(query)
-    athlete: List[AthleteOut] = results.scalars().all()
+    athlete: Page[AthleteOut] | FastPage = await paginate_athletes(db_session, athlete_cpf_page, values = {"cpf": cpf})
 
-    
-    if not athlete:
+    if not athlete.total:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail = f"Athlete not found by CPF: {cpf}")
 
-    return paginate(athlete)
+    return page_response(athlete)
 
 @router.get(
         path = '/sex:{sex}',
@@ -166,17 +461,14 @@ async def get_athlete_by_cpf(cpf: str, db_session: DatabaseDependency) -> Page[A
             
 )
 
-async def get_athlete_by_sex(sex: Sex, db_session: DatabaseDependency) -> Page[AthleteOut]:
+async def get_athlete_by_sex(sex: Sex, db_session: ReadDatabaseDependency) -> Page[AthleteOut]:
     
-    query = select(AthleteModel).filter_by(sex = sex)
-    results = await db_session.execute(query)
-    athlete: List[AthleteOut] = results.scalars().all()
+    athlete: Page[AthleteOut] | FastPage = await paginate_athletes(db_session, athlete_sex_page, values = {"sex": sex.value})
 
-    
-    if not athlete:
+    if not athlete.total:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail = f"Athlete not found by sex: {sex}")
 
-    return paginate(athlete)
+    return page_response(athlete)
 
 
 @router.get(
@@ -186,17 +478,14 @@ async def get_athlete_by_sex(sex: Sex, db_session: DatabaseDependency) -> Page[A
         response_model = Page[AthleteOut]
 )
 
-async def get_athlete_by_age(db_session: DatabaseDependency, min_age: int = 0, max_age: int = 200) -> Page[AthleteOut]:
+async def get_athlete_by_age(db_session: ReadDatabaseDependency, min_age: int = 0, max_age: int = 200) -> Page[AthleteOut]:
     
-    query = select(AthleteModel).filter(AthleteModel.age >= min_age, AthleteModel.age <= max_age)
-    results = await db_session.execute(query)
-    athlete: List[AthleteOut] = results.scalars().all()
+    athlete: Page[AthleteOut] | FastPage = await paginate_athletes(db_session, athlete_age_page, values = {"min_age": min_age, "max_age": max_age})
 
-    
-    if not athlete:
+    if not athlete.total:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail = f"Athlete not found by age: min {min_age}, max {max_age}")
 
-    return paginate(athlete)
+    return page_response(athlete)
 
 @router.get(
         path = '/weight:{weight}',
@@ -205,17 +494,14 @@ async def get_athlete_by_age(db_session: DatabaseDependency, min_age: int = 0, m
         response_model = Page[AthleteOut]
 )
 
-async def get_athlete_by_weight(db_session: DatabaseDependency, min_weight: int = 0, max_weight: int = athlete_config.max_weight) -> Page[AthleteOut]:
+async def get_athlete_by_weight(db_session: ReadDatabaseDependency, min_weight: int = 0, max_weight: int = athlete_config.max_weight) -> Page[AthleteOut]:
     
-    query = select(AthleteModel).filter(AthleteModel.weight >= min_weight, AthleteModel.weight <= max_weight)
-    results = await db_session.execute(query)
-    athlete: List[AthleteOut] = results.scalars().all()
+    athlete: Page[AthleteOut] | FastPage = await paginate_athletes(db_session, athlete_weight_page, values = {"min_weight": min_weight, "max_weight": max_weight})
 
-    
-    if not athlete:
+    if not athlete.total:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail = f"Athlete not found by weight: min {min_weight}, max {max_weight}")
 
-    return paginate(athlete)
+    return page_response(athlete)
 
 @router.get(
         path = '/height:{height}',
@@ -224,17 +510,127 @@ async def get_athlete_by_weight(db_session: DatabaseDependency, min_weight: int
         response_model = Page[AthleteOut]
 )
 
-async def get_athlete_by_height(db_session: DatabaseDependency, min_height: int = 0, max_height: int = athlete_config.max_height) -> Page[AthleteOut]:
+async def get_athlete_by_height(db_session: ReadDatabaseDependency, min_height: float = 0, max_height: float = athlete_config.max_height) -> Page[AthleteOut]:
     
-    query = select(AthleteModel).filter(AthleteModel.weight >= min_height, AthleteModel.weight <= max_height)
-    results = await db_session.execute(query)
-    athlete: List[AthleteOut] = results.scalars().all()
+    athlete: Page[AthleteOut] | FastPage = await paginate_athletes(db_session, athlete_height_page, values = {"min_height": min_height, "max_height": max_height})
 
-    
-    if not athlete:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail = f"Athlete not found by weight: min {min_height}, max {max_height}")
+    if not athlete.total:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail = f"Athlete not found by height: min {min_height}, max {max_height}")
+
+    return page_response(athlete)
+
+
+@router.get(
+        path = '/search',
+        summary = "Find Athletes combining any of the filters",
+        status_code = status.HTTP_200_OK,
+        response_model = Page[AthleteOut]
+)
+
+async def search(
+    db_session: ReadDatabaseDependency,
+    search: AthleteSearch = Depends(),
+    sort_by: AthleteSortField = AthleteSortField.created_at,
+    order: SortOrder = SortOrder.asc
+) -> Page[AthleteOut]:
+
+    athlete: Page[AthleteOut] | FastPage = await paginate_athletes(db_session, search_athletes(search, sort_by, order))
+
+    if not athlete.total:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail = "Athlete not found with the given filters")
+
+    return page_response(athlete)
+
+@router.get(
+        path = '/export',
+        summary = "Export Athletes as NDJSON or CSV",
+        status_code = status.HTTP_200_OK,
+        response_class = StreamingResponse,
+        responses = {200: {"content": {"application/x-ndjson": {}, "text/csv": {}}}}
+)
+
+async def export(
+    search: AthleteSearch = Depends(),
+    format: ExportFormat = ExportFormat.ndjson
+) -> StreamingResponse:
+
+    query = athlete_rows(search)
+    if format == ExportFormat.csv:
+        return StreamingResponse(
+            csv_export(query),
+            media_type = "text/csv",
+            headers = {"Content-Disposition": 'attachment; filename="athletes.csv"'}
+        )
+    return StreamingResponse(ndjson_export(query), media_type = "application/x-ndjson")
+
+@router.get(
+        path = '/changes',
+        summary = "Athletes created, edited or removed since a time or a previous page",
+        status_code = status.HTTP_200_OK,
+        response_model = AthleteChangesOut
+)
+
+async def changes(
+    db_session: DatabaseDependency,
+    since: Optional[datetime] = None,
+    token: Optional[str] = None,
+    size: int = Query(100, ge = 1, le = 1000)
+) -> AthleteChangesOut:
+    # Keyset on (change_txid, id): each page costs its own rows, whatever the size of the table.
+    # Read from the primary, where the transactions the watermark waits for run
+    after = None
+    if token is not None:
+        try:
+            after = decode_token(token)
+        except ValueError as e:
+            raise HTTPException(status_code = status.HTTP_400_BAD_REQUEST, detail = str(e))
+    elif since is not None:
+        # Stored times are naive local times, like created_at
+        if since.tzinfo is not None:
+            since = since.astimezone().replace(tzinfo = None)
+        after = await key_since(db_session, since)
+
+    return await changes_page(db_session, after, size)
+
+@router.get(
+        path = '/cursor/',
+        summary = "List all Athletes (cursor pagination)",
+        status_code = status.HTTP_200_OK,
+        response_model = CursorPage[AthleteOut]
+)
+
+async def get_all_athletes_by_cursor(db_session: ReadDatabaseDependency) -> CursorPage[AthleteOut]:
+    return await paginate(db_session, with_names(keyset_order(all_athletes())))
 
-    return paginate(athlete)
+@router.get(
+        path = '/cursor/sex:{sex}',
+        summary = "Find Athlete by Sex (cursor pagination)",
+        status_code = status.HTTP_200_OK,
+        response_model = CursorPage[AthleteOut]
+)
+
+async def get_athlete_by_sex_by_cursor(sex: Sex, db_session: ReadDatabaseDependency) -> CursorPage[AthleteOut]:
+    return await paginate(db_session, with_names(keyset_order(athletes_by_sex(sex))))
+
+@router.get(
+        path = '/cursor/age:{age}',
+        summary = "Find Athlete by Age (cursor pagination)",
+        status_code = status.HTTP_200_OK,
+        response_model = CursorPage[AthleteOut]
+)
+
+async def get_athlete_by_age_by_cursor(db_session: ReadDatabaseDependency, min_age: int = 0, max_age: int = 200) -> CursorPage[AthleteOut]:
+    return await paginate(db_session, with_names(keyset_order(athletes_by_age(min_age, max_age))))
+
+@router.get(
+        path = '/cursor/weight:{weight}',
+        summary = "Find Athlete by Weight (cursor pagination)",
+        status_code = status.HTTP_200_OK,
+        response_model = CursorPage[AthleteOut]
+)
+
+async def get_athlete_by_weight_by_cursor(db_session: ReadDatabaseDependency, min_weight: int = 0, max_weight: int = athlete_config.max_weight) -> CursorPage[AthleteOut]:
+    return await paginate(db_session, with_names(keyset_order(athletes_by_weight(min_weight, max_weight))))
 
 
 @router.get(
@@ -243,10 +639,11 @@ async def get_athlete_by_height(db_session: DatabaseDependency, min_height: int
         status_code = status.HTTP_200_OK,
         response_model = AthleteOut
 )
+@cached("athletes")
 
-async def get_athlete_by_id(id: UUID4, db_session: DatabaseDependency) -> AthleteOut:
+async def get_athlete_by_id(id: UUID4, db_session: ReadDatabaseDependency) -> AthleteOut:
     athlete: AthleteOut = (
-        await db_session.execute(select(AthleteModel).filter_by(id = id))
+        await db_session.execute(athlete_by_id, {"id": id})
     ).scalars().first()
     
     if not athlete:
@@ -267,8 +664,16 @@ async def patch(
     athlete_update: AthleteUpdate = Body(...)
 ) -> AthleteOut:
 
+    # Same checks as the bulk PATCH
+    error = athlete_update_error(athlete_update)
+    if error:
+        raise HTTPException(
+            status_code = status.HTTP_400_BAD_REQUEST,
+            detail = error
+        )
+
     athlete: AthleteOut = (
-        await db_session.execute(select(AthleteModel).filter_by(id = id))
+        await db_session.execute(locked_for_stats(athlete_by_id), {"id": id})
     ).scalars().first()
     
     if not athlete:
@@ -276,11 +681,22 @@ async def patch(
             status_code = status.HTTP_404_NOT_FOUND,
             detail = f"Athlete not found: {id}"
         )
+    stats_delta = StatsDelta()
+    stats_delta.remove(athlete_stats_values(athlete))
     athlete_update = athlete_update.model_dump(exclude_unset = True)
+    if "sex" in athlete_update:
+        athlete_update["sex"] = athlete_update["sex"].lower()
     for key, value in athlete_update.items():
         setattr(athlete, key, value)
+    athlete.updated_at = datetime.now()
+    stats_delta.add(athlete_stats_values(athlete))
+    await stats_delta.apply(db_session)
     await db_session.commit()
-    await db_session.refresh(athlete)
+    await response_cache.invalidate("athletes")
+    # Reloaded with the JOIN, refresh() would leave category and gym unloaded
+    athlete = (
+        await db_session.execute(athlete_by_id, {"id": id}, execution_options = {"populate_existing": True})
+    ).scalars().first()
     return athlete
 
 @router.delete(
@@ -291,7 +707,7 @@ async def patch(
 
 async def delete(id: UUID4, db_session: DatabaseDependency) -> None:
     athlete: AthleteOut = (
-        await db_session.execute(select(AthleteModel).filter_by(id = id))
+        await db_session.execute(locked_for_stats(athlete_model_by_id), {"id": id})
     ).scalars().first()
     
     if not athlete:
@@ -299,5 +715,10 @@ async def delete(id: UUID4, db_session: DatabaseDependency) -> None:
             status_code = status.HTTP_404_NOT_FOUND,
             detail = f"Athlete not found: {id}")
     
+    stats_delta = StatsDelta()
+    stats_delta.remove(athlete_stats_values(athlete))
     await db_session.delete(athlete)
+    db_session.add(AthleteTombstoneModel(id = athlete.id, deleted_at = datetime.now(), change_txid = change_txid(athlete.change_txid)))
+    await stats_delta.apply(db_session)
     await db_session.commit()
+    await response_cache.invalidate("athletes")
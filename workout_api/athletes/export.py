@@ -0,0 +1,28 @@
+import csv
+import io
+from typing import AsyncIterator
+import orjson
+from sqlalchemy import Select
+
+from workout_api.athletes.serializers import athlete_row_to_dict
+from workout_api.contrib.streaming import stream_partitions
+
+csv_columns = ["id", "created_at", "name", "cpf", "age", "weight", "height", "sex", "category", "gym"]
+
+
+async def ndjson_export(query: Select) -> AsyncIterator[bytes]:
+    async for rows in stream_partitions(query):
+        yield b"".join(orjson.dumps(athlete_row_to_dict(row)) + b"\n" for row in rows)
+
+
+async def csv_export(query: Select) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(csv_columns)
+    async for rows in stream_partitions(query):
+        writer.writerows((str(row.id), row.created_at.isoformat(), *row[2:]) for row in rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
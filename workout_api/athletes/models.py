@@ -1,12 +1,27 @@
 from datetime import datetime
-from sqlalchemy import DateTime, Float, ForeignKey, Integer, String
+from sqlalchemy import BigInteger, DateTime, Float, ForeignKey, Index, Integer, String
 from workout_api.contrib.models import BaseModel
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 import workout_api.athletes.config as athlete_config
+import workout_api.athletes.txid as txid
 
 class AthleteModel(BaseModel):
     __tablename__ = 'athletes'
+    __table_args__ = (
+        Index("ix_athletes_created_at_pk_id", "created_at", "pk_id"),
+        Index("ix_athletes_age", "age"),
+        Index("ix_athletes_weight", "weight"),
+        Index("ix_athletes_height", "height"),
+        Index("ix_athletes_sex_age", "sex", "age"),
+        Index("ix_athletes_category_id", "category_id"),
+        Index("ix_athletes_gym_id_created_at", "gym_id", "created_at"),
+        # Key order of the change feed, and where a client asking for the changes since a time starts
+        Index("ix_athletes_change_txid_id", "change_txid", "id"),
+        Index("ix_athletes_updated_at_change_txid", "updated_at", "change_txid"),
+        Index("ix_athletes_name_trgm", "name", postgresql_using = "gin", postgresql_ops = {"name": "gin_trgm_ops"}),
+        Index("ix_athletes_cpf_trgm", "cpf", postgresql_using = "gin", postgresql_ops = {"cpf": "gin_trgm_ops"}).ddl_if(dialect = "postgresql"),
+    )
 
     pk_id: Mapped[int] = mapped_column(Integer, primary_key = True)
     name: Mapped[str] = mapped_column(String(athlete_config.name_max_length), nullable = False)
@@ -16,7 +31,22 @@ class AthleteModel(BaseModel):
     height: Mapped[float] = mapped_column(Float, nullable = False)
     sex: Mapped[str] = mapped_column(String(1), nullable = False)
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable = False)
-    category: Mapped["CategoryModel"] = relationship(back_populates = "athlete", lazy = "selectin")
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable = False)
+    # Transaction that last wrote the row, see athletes/txid.py
+    change_txid: Mapped[int] = mapped_column(BigInteger, nullable = False, default = txid.change_txid(), onupdate = txid.change_txid())
+    category: Mapped["CategoryModel"] = relationship(back_populates = "athlete", lazy = "raise")
     category_id : Mapped[int] = mapped_column(ForeignKey("categories.pk_id"))
-    gym: Mapped["GymModel"] = relationship(back_populates = "athlete", lazy = "selectin")
-    gym_id : Mapped[int] = mapped_column(ForeignKey("gyms.pk_id"))
\ No newline at end of file
+    gym: Mapped["GymModel"] = relationship(back_populates = "athlete", lazy = "raise")
+    gym_id : Mapped[int] = mapped_column(ForeignKey("gyms.pk_id"))
+
+class AthleteTombstoneModel(BaseModel):
+    # id of a deleted athlete, kept so the change feed can report the removal
+    __tablename__ = 'athlete_tombstones'
+    __table_args__ = (
+        Index("ix_athlete_tombstones_change_txid_id", "change_txid", "id"),
+        Index("ix_athlete_tombstones_deleted_at_change_txid", "deleted_at", "change_txid"),
+    )
+
+    pk_id: Mapped[int] = mapped_column(Integer, primary_key = True)
+    deleted_at: Mapped[datetime] = mapped_column(DateTime, nullable = False)
+    change_txid: Mapped[int] = mapped_column(BigInteger, nullable = False, default = txid.change_txid())
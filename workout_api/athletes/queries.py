@@ -0,0 +1,207 @@
+from datetime import datetime
+from functools import cached_property
+from typing import Optional
+from uuid import UUID
+from fastapi_pagination.ext.sqlalchemy import create_count_query
+from sqlalchemy import Delete, Insert, Select, Update, and_, bindparam, case, delete, exists, func, insert, literal, or_, true, union_all, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.future import select
+from sqlalchemy.orm import contains_eager
+
+from workout_api.athletes.models import AthleteModel, AthleteTombstoneModel
+from workout_api.athletes.schemas import AthleteSearch, AthleteSortField, SortOrder
+from workout_api.athletes.txid import txid_watermark
+from workout_api.categories.models import CategoryModel
+from workout_api.contrib.pagination import PreparedQuery
+from workout_api.gyms.models import GymModel
+
+
+def all_athletes() -> Select:
+    return select(AthleteModel)
+
+def athletes_by_sex(sex: str) -> Select:
+    return select(AthleteModel).filter_by(sex = sex)
+
+def athletes_by_age(min_age: int, max_age: int) -> Select:
+    return select(AthleteModel).filter(AthleteModel.age >= min_age, AthleteModel.age <= max_age)
+
+def athletes_by_weight(min_weight: float, max_weight: float) -> Select:
+    return select(AthleteModel).filter(AthleteModel.weight >= min_weight, AthleteModel.weight <= max_weight)
+
+def athletes_by_height(min_height: float, max_height: float) -> Select:
+    return select(AthleteModel).filter(AthleteModel.height >= min_height, AthleteModel.height <= max_height)
+
+def keyset_order(query: Select) -> Select:
+    # Stable order for cursor pages, served by the (created_at, pk_id) index
+    return query.order_by(AthleteModel.created_at, AthleteModel.pk_id)
+
+def athlete_filters(search: AthleteSearch) -> list:
+    filters = []
+    if search.name is not None:
+        filters.append(AthleteModel.name.contains(search.name, autoescape = True))
+    if search.cpf is not None:
+        filters.append(AthleteModel.cpf.startswith(search.cpf, autoescape = True))
+    if search.sex is not None:
+        filters.append(AthleteModel.sex == search.sex.value)
+    if search.min_age is not None:
+        filters.append(AthleteModel.age >= search.min_age)
+    if search.max_age is not None:
+        filters.append(AthleteModel.age <= search.max_age)
+    if search.min_weight is not None:
+        filters.append(AthleteModel.weight >= search.min_weight)
+    if search.max_weight is not None:
+        filters.append(AthleteModel.weight <= search.max_weight)
+    if search.min_height is not None:
+        filters.append(AthleteModel.height >= search.min_height)
+    if search.max_height is not None:
+        filters.append(AthleteModel.height <= search.max_height)
+    # Names resolve to a pk_id once, so the gym_id/category_id indexes are used
+    if search.gym is not None:
+        filters.append(AthleteModel.gym_id == select(GymModel.pk_id).filter_by(name = search.gym).scalar_subquery())
+    if search.category is not None:
+        filters.append(AthleteModel.category_id == select(CategoryModel.pk_id).filter_by(name = search.category).scalar_subquery())
+    return filters
+
+def search_athletes(search: AthleteSearch, sort_by: AthleteSortField, order: SortOrder) -> Select:
+    sort_column = getattr(AthleteModel, sort_by.value)
+    if order == SortOrder.desc:
+        return select(AthleteModel).where(*athlete_filters(search)).order_by(sort_column.desc(), AthleteModel.pk_id.desc())
+    return select(AthleteModel).where(*athlete_filters(search)).order_by(sort_column, AthleteModel.pk_id)
+
+def with_names(query: Select) -> Select:
+    # Category and gym names come from the same statement, through a JOIN, instead of extra SELECTs
+    return query.join(AthleteModel.category).join(AthleteModel.gym).options(
+        contains_eager(AthleteModel.category).load_only(CategoryModel.name),
+        contains_eager(AthleteModel.gym).load_only(GymModel.name),
+    )
+
+def as_rows(query: Select) -> Select:
+    # Flat rows with category and gym names joined in SQL instead of loaded through the relationships
+    return query.with_only_columns(
+        AthleteModel.id,
+        AthleteModel.created_at,
+        AthleteModel.name,
+        AthleteModel.cpf,
+        AthleteModel.age,
+        AthleteModel.weight,
+        AthleteModel.height,
+        AthleteModel.sex,
+        CategoryModel.name.label("category"),
+        GymModel.name.label("gym"),
+    ).join(CategoryModel, AthleteModel.category_id == CategoryModel.pk_id).join(GymModel, AthleteModel.gym_id == GymModel.pk_id)
+
+class PreparedAthleteQuery:
+    # Athlete list statements built on first use: ORM objects with names, flat rows for the fast
+    # serializer, and a count without the JOINs
+    def __init__(self, query: Select) -> None:
+        self.query = query
+
+    @cached_property
+    def count_query(self) -> Select:
+        return create_count_query(self.query)
+
+    @cached_property
+    def models(self) -> PreparedQuery:
+        return PreparedQuery(with_names(self.query), self.count_query)
+
+    @cached_property
+    def rows(self) -> PreparedQuery:
+        return PreparedQuery(as_rows(self.query), self.count_query)
+
+# Statements of the hottest routes, built once so SQLAlchemy neither rebuilds them nor recomputes
+# their cache keys per request; the values are bound parameters
+athlete_by_id = with_names(select(AthleteModel).where(AthleteModel.id == bindparam("id")))
+athlete_model_by_id = select(AthleteModel).where(AthleteModel.id == bindparam("id"))
+athlete_name_page = PreparedAthleteQuery(select(AthleteModel).where(AthleteModel.name.contains(bindparam("name"))).order_by(AthleteModel.pk_id))
+athlete_cpf_page = PreparedAthleteQuery(select(AthleteModel).where(AthleteModel.cpf.contains(bindparam("cpf"))).order_by(AthleteModel.pk_id))
+athlete_sex_page = PreparedAthleteQuery(athletes_by_sex(bindparam("sex")).order_by(AthleteModel.pk_id))
+athlete_age_page = PreparedAthleteQuery(athletes_by_age(bindparam("min_age"), bindparam("max_age")).order_by(AthleteModel.pk_id))
+athlete_weight_page = PreparedAthleteQuery(athletes_by_weight(bindparam("min_weight"), bindparam("max_weight")).order_by(AthleteModel.pk_id))
+athlete_height_page = PreparedAthleteQuery(athletes_by_height(bindparam("min_height"), bindparam("max_height")).order_by(AthleteModel.pk_id))
+
+def athlete_rows(search: AthleteSearch) -> Select:
+    return as_rows(select(AthleteModel).where(*athlete_filters(search)).order_by(AthleteModel.pk_id))
+
+def insert_athlete(dialect_name: str, values: dict, category_name: str, gym_name: str) -> Insert:
+    # Category and gym resolved by name in the same statement; no row is inserted if either is missing
+    columns = AthleteModel.__table__.c
+    source = select(
+        *(literal(value, columns[key].type).label(key) for key, value in values.items()),
+        CategoryModel.pk_id.label("category_id"),
+        GymModel.pk_id.label("gym_id"),
+    ).select_from(CategoryModel).join(GymModel, true()).where(CategoryModel.name == category_name, GymModel.name == gym_name)
+
+    if dialect_name in ("postgresql", "sqlite"):
+        # A CPF taken by a concurrent request skips the row instead of failing the transaction
+        dialect_insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+        statement = dialect_insert(AthleteModel).from_select([*values, "category_id", "gym_id"], source).on_conflict_do_nothing(index_elements = ["cpf"])
+    else:
+        statement = insert(AthleteModel).from_select([*values, "category_id", "gym_id"], source)
+    return statement.returning(AthleteModel.pk_id, AthleteModel.category_id, AthleteModel.gym_id)
+
+def insert_new_athletes(dialect_name: str, rows: list[dict]) -> Insert:
+    # Multi-row INSERT returning the CPFs actually inserted; rows whose CPF is taken are skipped where supported
+    if dialect_name in ("postgresql", "sqlite"):
+        dialect_insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+        statement = dialect_insert(AthleteModel).values(rows).on_conflict_do_nothing(index_elements = ["cpf"])
+    else:
+        statement = insert(AthleteModel).values(rows)
+    return statement.returning(AthleteModel.cpf)
+
+def insert_diagnosis(category_name: str, gym_name: str, cpf: str) -> Select:
+    # Why insert_athlete returned no row: a missing category or gym, or a CPF in use
+    return select(
+        select(CategoryModel.pk_id).filter_by(name = category_name).scalar_subquery(),
+        select(GymModel.pk_id).filter_by(name = gym_name).scalar_subquery(),
+        exists().where(AthleteModel.cpf == cpf),
+    )
+
+def update_athletes(changes: dict[UUID, dict], updated_at: datetime) -> Update:
+    # One UPDATE for many athletes: each column takes its new value by id, or keeps the current one
+    columns = AthleteModel.__table__.c
+    fields = sorted({key for values in changes.values() for key in values})
+    return update(AthleteModel).where(AthleteModel.id.in_(changes)).values({
+        **{key: case(
+            {id: literal(values[key], columns[key].type) for id, values in changes.items() if key in values},
+            value = AthleteModel.id,
+            else_ = columns[key]
+        ) for key in fields},
+        "updated_at": updated_at,
+    }).returning(AthleteModel.id)
+
+def delete_athletes(*criteria) -> Delete:
+    return delete(AthleteModel).where(*criteria).returning(AthleteModel.id)
+
+def changed_after(change_txid, id, after: Optional[tuple[int, UUID]]) -> list:
+    if after is None:
+        return []
+    return [or_(change_txid > after[0], and_(change_txid == after[0], id > after[1]))]
+
+def athlete_changes(after: Optional[tuple[int, UUID]], size: int) -> Select:
+    # Keys of the next edits and removals in (change_txid, id) order, from finished transactions only;
+    # each side reads at most size rows of its index
+    edits = select(
+        AthleteModel.change_txid.label("change_txid"), AthleteModel.id.label("id"),
+        AthleteModel.updated_at.label("changed_at"), literal(False).label("deleted")
+    ).where(
+        AthleteModel.change_txid < txid_watermark(), *changed_after(AthleteModel.change_txid, AthleteModel.id, after)
+    ).order_by(AthleteModel.change_txid, AthleteModel.id).limit(size)
+    removals = select(
+        AthleteTombstoneModel.change_txid, AthleteTombstoneModel.id, AthleteTombstoneModel.deleted_at, literal(True)
+    ).where(
+        AthleteTombstoneModel.change_txid < txid_watermark(),
+        *changed_after(AthleteTombstoneModel.change_txid, AthleteTombstoneModel.id, after)
+    ).order_by(AthleteTombstoneModel.change_txid, AthleteTombstoneModel.id).limit(size)
+
+    changes = union_all(select(edits.subquery()), select(removals.subquery())).subquery()
+    return select(changes).order_by(changes.c.change_txid, changes.c.id).limit(size)
+
+def first_change_since(since: datetime) -> Select:
+    # Key a client asking for the changes since a time starts from: the first one changed since then,
+    # or the watermark, as transactions still running may yet commit changes made after it
+    keys = union_all(
+        select(func.min(AthleteModel.change_txid).label("change_txid")).where(AthleteModel.updated_at >= since),
+        select(func.min(AthleteTombstoneModel.change_txid)).where(AthleteTombstoneModel.deleted_at >= since),
+        select(txid_watermark()),
+    ).subquery()
+    return select(func.min(keys.c.change_txid))
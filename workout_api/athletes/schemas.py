@@ -1,10 +1,41 @@
+from datetime import datetime
+from enum import Enum
 from typing import Annotated, Optional
-from pydantic import Field, PositiveFloat
+from pydantic import UUID4, Field, PositiveFloat
 
 from workout_api.categories.schemas import CategoryIn
 from workout_api.contrib.schemas import BaseSchema, OutMixin
 from workout_api.gyms.schemas import GymAthlete
 
+class Sex(str, Enum):
+    male = "m"
+    female = "f"
+
+class AthleteSortField(str, Enum):
+    name = "name"
+    age = "age"
+    weight = "weight"
+    height = "height"
+    created_at = "created_at"
+
+class SortOrder(str, Enum):
+    asc = "asc"
+    desc = "desc"
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+class AthleteChangeType(str, Enum):
+    upsert = "upsert"
+    delete = "delete"
+
+class AthleteBulkStatus(str, Enum):
+    updated = "updated"
+    deleted = "deleted"
+    not_found = "not_found"
+    invalid = "invalid"
+
 class Athlete(BaseSchema):
     name: Annotated[str, Field(description = "Athlete\'s name", example = "João", max_length = 50)]
     cpf: Annotated[str, Field(description = "Athlete\'s CPF ", example = "12345678900", max_length = 11)]
@@ -26,4 +57,53 @@ class AthleteUpdate(BaseSchema):
     age: Annotated[Optional[int], Field(None, description = "Athlete\'s age ", example = "25")]
     weight: Annotated[Optional[PositiveFloat], Field(None, description = "Athlete\'s weight (kg) ", example = "75.5")]
     height: Annotated[Optional[PositiveFloat], Field(None, description = "Athlete\'s height (m)", example = "1.87")]
-    sex: Annotated[Optional[str], Field(None, description = "Athlete\'s sex (m or f)", example = "f", max_length = 1)]
\ No newline at end of file
+    sex: Annotated[Optional[str], Field(None, description = "Athlete\'s sex (m or f)", example = "f", max_length = 1)]
+
+class AthleteSearch(BaseSchema):
+    name: Annotated[Optional[str], Field(None, description = "Part of the athlete\'s name", example = "Jo")]
+    cpf: Annotated[Optional[str], Field(None, description = "Beginning of the athlete\'s CPF", example = "123")]
+    sex: Annotated[Optional[Sex], Field(None, description = "Athlete\'s sex (m or f)")]
+    min_age: Annotated[Optional[int], Field(None, description = "Minimum age")]
+    max_age: Annotated[Optional[int], Field(None, description = "Maximum age")]
+    min_weight: Annotated[Optional[float], Field(None, description = "Minimum weight (kg)")]
+    max_weight: Annotated[Optional[float], Field(None, description = "Maximum weight (kg)")]
+    min_height: Annotated[Optional[float], Field(None, description = "Minimum height (m)")]
+    max_height: Annotated[Optional[float], Field(None, description = "Maximum height (m)")]
+    gym: Annotated[Optional[str], Field(None, description = "Name of the gym", example = "Casa de Pedra")]
+    category: Annotated[Optional[str], Field(None, description = "Name of the category", example = "Scale")]
+
+class AthleteBulkError(BaseSchema):
+    row: Annotated[int, Field(description = "Position of the athlete in the request, starting at 0")]
+    cpf: Annotated[Optional[str], Field(None, description = "CPF of the rejected athlete")]
+    detail: Annotated[str, Field(description = "Reason the athlete was not inserted")]
+
+class AthleteBulkOut(BaseSchema):
+    inserted: Annotated[int, Field(description = "Number of athletes inserted")]
+    errors: Annotated[list[AthleteBulkError], Field(description = "Athletes that were not inserted")]
+
+class AthleteBulkUpdate(AthleteUpdate):
+    id: Annotated[UUID4, Field(description = "Identifier of the athlete to edit")]
+
+class AthleteBulkDelete(BaseSchema):
+    ids: Annotated[Optional[list[UUID4]], Field(None, description = "Identifiers of the athletes to remove")]
+    filter: Annotated[Optional[AthleteSearch], Field(None, description = "Remove every athlete matching these filters instead")]
+
+class AthleteBulkResult(BaseSchema):
+    id: Annotated[UUID4, Field(description = "Athlete identifier")]
+    status: Annotated[AthleteBulkStatus, Field(description = "What happened to the athlete")]
+    detail: Annotated[Optional[str], Field(None, description = "Reason the athlete was not changed")]
+
+class AthleteBulkChangeOut(BaseSchema):
+    changed: Annotated[int, Field(description = "Number of athletes updated or removed")]
+    results: Annotated[list[AthleteBulkResult], Field(description = "Outcome for each athlete, in request order")]
+
+class AthleteChange(BaseSchema):
+    id: Annotated[UUID4, Field(description = "Athlete identifier")]
+    change: Annotated[AthleteChangeType, Field(description = "Whether the athlete was created or edited, or removed")]
+    changed_at: Annotated[datetime, Field(description = "Time of the change")]
+    athlete: Annotated[Optional[AthleteOut], Field(None, description = "Current athlete, absent for removals")]
+
+class AthleteChangesOut(BaseSchema):
+    items: Annotated[list[AthleteChange], Field(description = "Changes in commit order")]
+    next_token: Annotated[str, Field(description = "Pass as token to get the changes after this page")]
+    has_more: Annotated[bool, Field(description = "Whether more changes are ready right away")]
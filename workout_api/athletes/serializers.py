@@ -0,0 +1,75 @@
+from math import ceil
+from typing import Optional
+import orjson
+from fastapi import Response
+from fastapi_pagination import Page
+from fastapi_pagination.api import resolve_params
+from sqlalchemy import Row, Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from workout_api.athletes.queries import PreparedAthleteQuery
+from workout_api.athletes.schemas import AthleteOut
+from workout_api.configs.settings import settings
+from workout_api.contrib.pagination import approximate_count, paginate_prepared
+
+
+def athlete_row_to_dict(row: Row) -> dict:
+    # Same keys, in the same order, as AthleteOut; orjson encodes the UUID and datetime like pydantic does
+    return {
+        "id": row.id,
+        "created_at": row.created_at,
+        "name": row.name,
+        "cpf": row.cpf,
+        "age": row.age,
+        "weight": row.weight,
+        "height": row.height,
+        "sex": row.sex,
+        "category": {"name": row.category},
+        "gym": {"name": row.gym},
+    }
+
+
+class FastPage:
+    # A page of athletes as plain dicts, shaped like Page[AthleteOut]; page_response encodes it
+    def __init__(self, items: list[dict], total: int, page: int, size: int) -> None:
+        self.items = items
+        self.total = total
+        self.page = page
+        self.size = size
+        self.pages = ceil(total / size) if size else 0
+
+    def dump(self) -> dict:
+        return {"items": self.items, "total": self.total, "page": self.page, "size": self.size, "pages": self.pages}
+
+
+def page_response(page: Page[AthleteOut] | FastPage) -> Page[AthleteOut] | Response:
+    # What the route handlers return: a Page goes through the route's response_model, a FastPage is encoded here
+    if isinstance(page, FastPage):
+        return Response(content = orjson.dumps(page.dump()), media_type = "application/json")
+    return page
+
+
+async def paginate_athletes(
+    db_session: AsyncSession,
+    query: Select | PreparedAthleteQuery,
+    approximate_count_table: Optional[str] = None,
+    values: Optional[dict] = None
+) -> Page[AthleteOut] | FastPage:
+    # Queries built per request are prepared on the spot; the module-level ones in queries are reused
+    if not isinstance(query, PreparedAthleteQuery):
+        query = PreparedAthleteQuery(query)
+    values = values or {}
+    # Counted without the JOINs, which never change the number of athletes
+    count_query = approximate_count(db_session, approximate_count_table)
+    if count_query is None:
+        count_query = query.count_query
+    if not settings.FAST_LIST_SERIALIZATION:
+        return await paginate_prepared(db_session, query.models, values, count_query)
+
+    # Column tuples straight to JSON, skipping ORM objects and per-row AthleteOut validation
+    params = resolve_params()
+    raw_params = params.to_raw_params().as_limit_offset()
+    total = await db_session.scalar(count_query, values)
+    rows = (await db_session.execute(query.rows.page_query, {**values, "limit": raw_params.limit, "offset": raw_params.offset})).all()
+
+    return FastPage([athlete_row_to_dict(row) for row in rows], total, params.page, params.size)
@@ -0,0 +1,48 @@
+from sqlalchemy import BigInteger
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+# Keys of the change feed. The writing transaction assigns the key and every key below txid_watermark()
+# belongs to a finished transaction, so a client's token can't pass a change that is still to be committed.
+
+
+class change_txid(FunctionElement):
+    # Key of the rows a transaction writes. An optional floor, the key of a row being removed, keeps its removal above it
+    type = BigInteger()
+    inherit_cache = True
+
+
+class txid_watermark(FunctionElement):
+    type = BigInteger()
+    inherit_cache = True
+
+
+# Postgres: the id of the current transaction, and the oldest one still running
+@compiles(change_txid, "postgresql")
+def pg_change_txid(element, compiler, **kw) -> str:
+    return "txid_current()"
+
+
+@compiles(txid_watermark, "postgresql")
+def pg_txid_watermark(element, compiler, **kw) -> str:
+    return "txid_snapshot_xmin(txid_current_snapshot())"
+
+
+# SQLite runs one writing transaction at a time, so any key above the committed ones follows commit order
+NEXT_KEY = (
+    "(SELECT coalesce(max(change_txid), 0) + 1 FROM ("
+    "SELECT max(change_txid) AS change_txid FROM athletes UNION ALL SELECT max(change_txid) FROM athlete_tombstones))"
+)
+
+
+@compiles(change_txid)
+def next_change_txid(element, compiler, **kw) -> str:
+    # Deleting the athlete with the highest key lowers the max, hence the floor
+    if len(element.clauses):
+        return f"max({NEXT_KEY}, {compiler.process(element.clauses, **kw)} + 1)"
+    return NEXT_KEY
+
+
+@compiles(txid_watermark)
+def next_txid_watermark(element, compiler, **kw) -> str:
+    return NEXT_KEY
@@ -0,0 +1,45 @@
+from typing import Optional
+
+import workout_api.athletes.config as athlete_config
+from workout_api.athletes.schemas import AthleteIn, AthleteUpdate
+from workout_api.helper.input_validator import InputValidator
+
+
+def athlete_input_error(athlete_in: AthleteIn, cpf_valid: Optional[bool] = None) -> Optional[str]:
+    # Check if CPF is valid, unless it was already checked with the rest of a batch
+    if cpf_valid is None:
+        cpf_valid = InputValidator.is_valid_cpf(athlete_in.cpf)
+    if not cpf_valid:
+        return f"CPF {athlete_in.cpf} is not valid"
+
+    # Check if sex is either M or F
+    if not InputValidator.is_input_in_list(input = athlete_in.sex.lower(), options = ["m", "f"]):
+        return f"Sex {athlete_in.sex} is not valid"
+
+    # Check if weight is within the upper limit
+    if athlete_in.weight > athlete_config.max_weight:
+        return f"Weight {athlete_in.weight} is too high. Max weight is {athlete_config.max_weight}"
+
+    # Check if height is within the upper limit
+    if athlete_in.height > athlete_config.max_height:
+        return f"Height {athlete_in.height} is probably wrong. Max height is {athlete_config.max_height}. Insert height in meters"
+
+    return None
+
+def athlete_update_error(athlete_update: AthleteUpdate) -> Optional[str]:
+    # Same checks as athlete_input_error, for the fields being changed
+    # Every column is NOT NULL, so an explicit null can't be stored
+    nulls = [field for field in AthleteUpdate.model_fields if field in athlete_update.model_fields_set and getattr(athlete_update, field) is None]
+    if nulls:
+        return f"{', '.join(nulls).capitalize()} can't be null"
+
+    if athlete_update.sex is not None and not InputValidator.is_input_in_list(input = athlete_update.sex.lower(), options = ["m", "f"]):
+        return f"Sex {athlete_update.sex} is not valid"
+
+    if athlete_update.weight is not None and athlete_update.weight > athlete_config.max_weight:
+        return f"Weight {athlete_update.weight} is too high. Max weight is {athlete_config.max_weight}"
+
+    if athlete_update.height is not None and athlete_update.height > athlete_config.max_height:
+        return f"Height {athlete_update.height} is probably wrong. Max height is {athlete_config.max_height}. Insert height in meters"
+
+    return None
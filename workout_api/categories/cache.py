@@ -0,0 +1,5 @@
+from workout_api.categories.models import CategoryModel
+from workout_api.categories.schemas import CategoryOut
+from workout_api.contrib.cache import ModelCache
+
+category_cache = ModelCache("categories", CategoryModel, CategoryOut)
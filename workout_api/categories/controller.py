@@ -1,18 +1,28 @@
-from typing import List
 from uuid import uuid4
 from fastapi import APIRouter, Body, HTTPException, status
-from fastapi_pagination import Page, add_pagination, paginate
-from fastapi_pagination.utils import disable_installed_extensions_check
+from fastapi.responses import StreamingResponse
+from fastapi_pagination import Page, paginate as paginate_list
 
 from pydantic import UUID4
+from sqlalchemy import bindparam
 from sqlalchemy.future import select
+from workout_api.categories.cache import category_cache
 from workout_api.categories.schemas import CategoryIn, CategoryOut
 from workout_api.categories.models import CategoryModel
 
-from workout_api.contrib.dependencies import DatabaseDependency
+from workout_api.contrib.dependencies import DatabaseDependency, ReadDatabaseDependency
+from workout_api.contrib.pagination import PreparedQuery, paginate
+from workout_api.contrib.response_cache import CachedRoute, cached, response_cache
+from workout_api.contrib.search import ranked_name_search
+from workout_api.contrib.streaming import ndjson_stream
+from workout_api.stats.schemas import StatsOut
+from workout_api.stats.summary import group_stats
 
 
-router = APIRouter()
+router = APIRouter(route_class = CachedRoute)
+
+# Statement of the /name:{name} route, built once
+category_name_page = PreparedQuery(select(CategoryModel).where(CategoryModel.name.contains(bindparam("name"))).order_by(CategoryModel.pk_id))
 
 @router.post(
         path = '/',
@@ -37,6 +47,8 @@ async def post(
     category_model = CategoryModel(**category_out.model_dump())
     db_session.add(category_model)
     await db_session.commit()
+    category_cache.invalidate()
+    await response_cache.invalidate("categories")
     return category_out
 
 
@@ -46,11 +58,11 @@ async def post(
         status_code = status.HTTP_200_OK,
         response_model = Page[CategoryOut]
 )
+@cached("categories")
 
-async def query(db_session: DatabaseDependency) -> Page[CategoryOut]:
-    categories: List[CategoryOut] = (await db_session.execute(select(CategoryModel))).scalars().all()
-    
-    return paginate(categories)
+async def query(db_session: ReadDatabaseDependency) -> Page[CategoryOut]:
+    # Small, rarely written table: the whole list is cached and paginated in memory
+    return paginate_list(await category_cache.all(db_session))
 
 @router.get(
         path = '/name:{name}',
@@ -58,19 +70,64 @@ async def query(db_session: DatabaseDependency) -> Page[CategoryOut]:
         status_code = status.HTTP_200_OK,
         response_model = Page[CategoryOut]
 )
+@cached("categories")
 
-async def query(name: str, db_session: DatabaseDependency) -> Page[CategoryOut]:
+async def query(name: str, db_session: ReadDatabaseDependency) -> Page[CategoryOut]:
 
-    query = select(CategoryModel).where(CategoryModel.name.contains(name))
-    results = await db_session.execute(query)
-    category: List[CategoryOut] = results.scalars().all()
+    category: Page[CategoryOut] = await paginate(db_session, category_name_page, values = {"name": name})
 
-    if not category:
+    if not category.total:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail = f"Category not found: {name}")
 
-    return paginate(category)
+    return category
+
+
 
+@router.get(
+        path = '/search:{name}',
+        summary = "Search Categories by name, best matches first",
+        status_code = status.HTTP_200_OK,
+        response_model = Page[CategoryOut]
+)
+
+async def query(name: str, db_session: ReadDatabaseDependency, stream: bool = False) -> Page[CategoryOut]:
+
+    query = ranked_name_search(select(CategoryModel), CategoryModel.name, CategoryModel.pk_id, name, db_session.bind.dialect.name)
+    if stream:
+        return StreamingResponse(ndjson_stream(query, CategoryOut), media_type = "application/x-ndjson")
+
+    category: Page[CategoryOut] = await paginate(db_session, query)
+
+    if not category.total:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail = f"Category not found: {name}")
+
+    return category
+
+@router.get(
+        path = '/stats',
+        summary = "Athlete stats of every category",
+        status_code = status.HTTP_200_OK,
+        response_model = list[StatsOut]
+)
+
+async def query(db_session: ReadDatabaseDependency) -> list[StatsOut]:
+    # Aggregated in SQL, or read from the summary table when STATS_SUMMARY is on
+    return await group_stats(db_session, CategoryModel)
+
+@router.get(
+        path = '/{id}/stats',
+        summary = "Athlete stats of a category",
+        status_code = status.HTTP_200_OK,
+        response_model = StatsOut
+)
+
+async def query(id: UUID4, db_session: ReadDatabaseDependency) -> StatsOut:
+    stats = await group_stats(db_session, CategoryModel, id)
+
+    if not stats:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail = f"Category not found: {id}")
 
+    return stats[0]
 
 @router.get(
         path = '/{id}',
@@ -78,11 +135,10 @@ async def query(name: str, db_session: DatabaseDependency) -> Page[CategoryOut]:
         status_code = status.HTTP_200_OK,
         response_model = CategoryOut
 )
+@cached("categories")
 
-async def query(id: UUID4, db_session: DatabaseDependency) -> CategoryOut:
-    category: CategoryOut = (
-        await db_session.execute(select(CategoryModel).filter_by(id = id))
-    ).scalars().first()
+async def query(id: UUID4, db_session: ReadDatabaseDependency) -> CategoryOut:
+    category: CategoryOut = await category_cache.get_by_id(db_session, id)
     
     if not category:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail = f"Category not found: {id}")
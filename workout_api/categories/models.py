@@ -1,10 +1,14 @@
-from sqlalchemy import Integer, String
+from sqlalchemy import Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from workout_api.contrib.models import BaseModel
 import workout_api.categories.config as category_config
 
 class CategoryModel(BaseModel):
     __tablename__ = 'categories'
+    __table_args__ = (
+        # Other dialects already get a B-tree from the unique constraint on name
+        Index("ix_categories_name_trgm", "name", postgresql_using = "gin", postgresql_ops = {"name": "gin_trgm_ops"}).ddl_if(dialect = "postgresql"),
+    )
     pk_id: Mapped[int] = mapped_column(Integer, primary_key = True)
     name: Mapped[str] = mapped_column(String(category_config.name_max_length), unique = True, nullable = False)
     athlete: Mapped["AthleteModel"] = relationship(back_populates = "category")
@@ -1,15 +1,136 @@
-from typing import AsyncGenerator
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from workout_api.configs.settings import settings
+from workout_api.contrib.metrics import PoolMetrics, pools
+from workout_api.contrib.timing import listen_query_events
 
 
-engine = create_async_engine(settings.DB_URL, echo = False)
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    metrics: PoolMetrics
+
+    def connect(self):
+        # Time spent waiting for a free (or new) connection on checkout
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            self.metrics.checkout_wait.observe(time.perf_counter() - start)
+
+
+def build_engine(url: str, name: str) -> AsyncEngine:
+    url = make_url(url)
+    options = {"echo": False}
+    # In-memory SQLite keeps its single-connection pool
+    if not (url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")):
+        metrics = pools[name] = PoolMetrics(name)
+        options.update(
+            poolclass = type(f"{name.title()}Pool", (InstrumentedPool,), {"metrics": metrics}),
+            pool_size = settings.DB_POOL_SIZE,
+            max_overflow = settings.DB_MAX_OVERFLOW,
+            pool_timeout = settings.DB_POOL_TIMEOUT,
+            pool_recycle = settings.DB_POOL_RECYCLE,
+            pool_pre_ping = settings.DB_POOL_PRE_PING,
+        )
+    if url.get_driver_name() == "asyncpg":
+        # SQLAlchemy's asyncpg adapter prepares statements itself and keeps them per connection,
+        # keyed by the compiled SQL; asyncpg's own cache only serves statements run outside it
+        if "prepared_statement_cache_size" not in url.query:
+            url = url.update_query_dict({"prepared_statement_cache_size": str(settings.DB_STATEMENT_CACHE_SIZE)})
+        options["connect_args"] = {"statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+
+    engine = create_async_engine(url, **options)
+    listen_query_events(engine.sync_engine)
+    if name in pools:
+        listen_pool_events(engine, pools[name])
+    return engine
+
+
+def listen_pool_events(engine: AsyncEngine, metrics: PoolMetrics) -> None:
+    sync_engine = metrics.engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "checkout")
+    def on_checkout(*args) -> None:
+        metrics.checkouts += 1
+
+    @event.listens_for(sync_engine, "connect")
+    def on_connect(*args) -> None:
+        metrics.connects += 1
+        # A new connection while overflow is positive goes beyond pool_size
+        if sync_engine.pool.overflow() > 0:
+            metrics.overflow_connects += 1
+
+    @event.listens_for(sync_engine, "invalidate")
+    def on_invalidate(*args) -> None:
+        metrics.invalidations += 1
+
+
+engine = build_engine(settings.DB_URL, "primary")
 async_session = sessionmaker(
     engine, class_ = AsyncSession, expire_on_commit = False
 )
 
+read_engines = [build_engine(url, f"replica_{index}") for index, url in enumerate(settings.READ_DB_URLS)]
+read_async_sessions = [
+    sessionmaker(read_engine, class_ = AsyncSession, expire_on_commit = False) for read_engine in read_engines
+]
+
+
+class ReplicaRouter:
+    # Round-robin over the replicas, skipping the ones that recently failed to connect
+    def __init__(self, count: int) -> None:
+        self.next = 0
+        self.unhealthy_until = [0.0] * count
+
+    def candidates(self) -> list[int]:
+        count = len(self.unhealthy_until)
+        if not count:
+            return []
+        start, self.next = self.next, (self.next + 1) % count
+        now = time.monotonic()
+        return [
+            index for index in ((start + offset) % count for offset in range(count))
+            if self.unhealthy_until[index] <= now
+        ]
+
+    def mark_unhealthy(self, index: int) -> None:
+        self.unhealthy_until[index] = time.monotonic() + settings.READ_REPLICA_RETRY_AFTER
+
+replica_router = ReplicaRouter(len(read_engines))
+
+
+@asynccontextmanager
+async def read_session() -> AsyncIterator[AsyncSession]:
+    for index in replica_router.candidates():
+        session = read_async_sessions[index]()
+        try:
+            # Connect up front so an unreachable replica falls through to the next one
+            await session.connection()
+        except (exc.DBAPIError, exc.TimeoutError, OSError):
+            await session.close()
+            replica_router.mark_unhealthy(index)
+            continue
+        async with session:
+            yield session
+        return
+
+    async with async_session() as session:
+        yield session
+
+
 async def get_session() -> AsyncGenerator:
     async with async_session() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+async def get_read_session() -> AsyncGenerator:
+    async with read_session() as session:
+        yield session
@@ -0,0 +1,105 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable, Optional
+from sqlalchemy import bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from workout_api.configs.settings import settings
+from workout_api.contrib.models import BaseModel
+from workout_api.contrib.schemas import BaseSchema
+
+# Every ModelCache by name, read by the /metrics routes
+caches: dict[str, "ModelCache"] = {}
+
+
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        # Most recently used entries move to the end, eviction pops from the front
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last = False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "maxsize": self.maxsize}
+
+
+class ModelCache:
+    # name -> pk_id and id -> row for small, rarely written tables; writers must call invalidate()
+    def __init__(self, name: str, model: type[BaseModel], schema: type[BaseSchema]) -> None:
+        self.model = model
+        self.schema = schema
+        self.pk_ids = TTLCache(settings.REFERENCE_CACHE_MAXSIZE, settings.REFERENCE_CACHE_TTL)
+        self.rows = TTLCache(settings.REFERENCE_CACHE_MAXSIZE, settings.REFERENCE_CACHE_TTL)
+        self.listing = TTLCache(1, settings.REFERENCE_CACHE_TTL)
+        # Built once, the lookups only bind their values
+        self.by_id = select(model).where(model.id == bindparam("id"))
+        self.by_names = select(model.name, model.pk_id).where(model.name.in_(bindparam("names", expanding = True)))
+        self.ordered = select(model).order_by(model.pk_id)
+        caches[name] = self
+
+    async def pk_id_by_name(self, db_session: AsyncSession, name: str) -> Optional[int]:
+        return (await self.pk_ids_by_name(db_session, [name])).get(name)
+
+    async def pk_ids_by_name(self, db_session: AsyncSession, names: Iterable[str]) -> dict[str, int]:
+        pk_ids = {}
+        missing = set()
+        for name in names:
+            pk_id = self.pk_ids.get(name)
+            if pk_id is None:
+                missing.add(name)
+            else:
+                pk_ids[name] = pk_id
+
+        if missing:
+            for name, pk_id in (await db_session.execute(self.by_names, {"names": list(missing)})).all():
+                self.pk_ids.set(name, pk_id)
+                pk_ids[name] = pk_id
+        return pk_ids
+
+    async def get_by_id(self, db_session: AsyncSession, id: Any) -> Optional[BaseSchema]:
+        row = self.rows.get(id)
+        if row is None:
+            model = (await db_session.execute(self.by_id, {"id": id})).scalars().first()
+            if model is None:
+                return None
+            row = self.schema.model_validate(model)
+            self.rows.set(id, row)
+        return row
+
+    async def all(self, db_session: AsyncSession) -> list[BaseSchema]:
+        rows = self.listing.get("all")
+        if rows is None:
+            models = (await db_session.execute(self.ordered)).scalars().all()
+            rows = [self.schema.model_validate(model) for model in models]
+            self.listing.set("all", rows)
+        return rows
+
+    def invalidate(self) -> None:
+        self.pk_ids.clear()
+        self.rows.clear()
+        self.listing.clear()
+
+    def stats(self) -> dict:
+        return {"pk_ids": self.pk_ids.stats(), "rows": self.rows.stats(), "listing": self.listing.stats()}
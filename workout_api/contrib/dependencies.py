@@ -2,7 +2,9 @@ from typing import Annotated
 from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from workout_api.configs.database import get_session
+from workout_api.configs.database import get_read_session, get_session
 
 
-DatabaseDependency = Annotated[AsyncSession, Depends(get_session)]
\ No newline at end of file
+DatabaseDependency = Annotated[AsyncSession, Depends(get_session)]
+# GET routes: a read replica when configured, otherwise the primary
+ReadDatabaseDependency = Annotated[AsyncSession, Depends(get_read_session)]
@@ -0,0 +1,110 @@
+import time
+from bisect import bisect_left
+from typing import Optional, Sequence
+from sqlalchemy.engine import Engine
+
+# Seconds; the last bucket catches everything above it
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, float("inf"))
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self) -> dict:
+        cumulative, total = {}, 0
+        for bucket, count in zip(self.buckets, self.counts):
+            total += count
+            cumulative["+Inf" if bucket == float("inf") else str(bucket)] = total
+        return {"count": self.count, "sum": self.sum, "buckets": cumulative}
+
+
+class PoolMetrics:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.checkout_wait = Histogram()
+        self.checkouts = 0
+        self.connects = 0
+        self.overflow_connects = 0
+        self.timeouts = 0
+        self.invalidations = 0
+        self.engine: Optional[Engine] = None
+
+    def snapshot(self) -> dict:
+        pool = self.engine.pool
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "checkouts": self.checkouts,
+            "connects": self.connects,
+            "overflow_connects": self.overflow_connects,
+            "timeouts": self.timeouts,
+            "invalidations": self.invalidations,
+            "checkout_wait_seconds": self.checkout_wait.snapshot(),
+        }
+
+# PoolMetrics of every engine by name, read by the /metrics routes
+pools: dict[str, PoolMetrics] = {}
+
+
+class RouteMetrics:
+    def __init__(self) -> None:
+        self.duration = Histogram()
+        self.db = Histogram()
+        self.serialization = Histogram()
+        self.queries = 0
+        self.responses: dict[int, int] = {}
+
+# RouteMetrics by (method, route template), filled by TimingMiddleware
+routes: dict[tuple[str, str], RouteMetrics] = {}
+
+
+def observe_request(method: str, route: str, status_code: int, timing) -> None:
+    metrics = routes.get((method, route))
+    if metrics is None:
+        metrics = routes[(method, route)] = RouteMetrics()
+    metrics.duration.observe(time.perf_counter() - timing.start)
+    metrics.db.observe(timing.db)
+    metrics.serialization.observe(timing.serialization)
+    metrics.queries += timing.queries
+    metrics.responses[status_code] = metrics.responses.get(status_code, 0) + 1
+
+
+def prometheus_text() -> str:
+    # Prometheus text exposition format 0.0.4
+    lines = []
+    histograms = [
+        ("http_request_duration_seconds", "Time from the request to the end of the response body", "duration"),
+        ("http_request_db_seconds", "Time spent executing SQL statements per request", "db"),
+        ("http_request_serialization_seconds", "Time spent validating and serializing the response per request", "serialization"),
+    ]
+    for name, help, attribute in histograms:
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} histogram"]
+        for (method, route), metrics in routes.items():
+            labels = f'method="{method}",route="{route}"'
+            snapshot = getattr(metrics, attribute).snapshot()
+            for bucket, count in snapshot["buckets"].items():
+                lines.append(f'{name}_bucket{{{labels},le="{bucket}"}} {count}')
+            lines.append(f"{name}_sum{{{labels}}} {snapshot['sum']}")
+            lines.append(f"{name}_count{{{labels}}} {snapshot['count']}")
+
+    lines += ["# HELP http_request_queries_total SQL statements executed on behalf of requests", "# TYPE http_request_queries_total counter"]
+    lines += [f'http_request_queries_total{{method="{method}",route="{route}"}} {metrics.queries}' for (method, route), metrics in routes.items()]
+
+    lines += ["# HELP http_responses_total Responses sent, by status code", "# TYPE http_responses_total counter"]
+    for (method, route), metrics in routes.items():
+        lines += [
+            f'http_responses_total{{method="{method}",route="{route}",status="{status_code}"}} {count}'
+            for status_code, count in sorted(metrics.responses.items())
+        ]
+    return "\n".join(lines) + "\n"
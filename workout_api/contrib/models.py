@@ -3,5 +3,11 @@ from sqlalchemy import UUID
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 
-class BaseModel(DeclarativeBase):
-    id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid = True), default = uuid4, nullable = False)
\ No newline at end of file
+class Base(DeclarativeBase):
+    # Shared metadata; tables only addressed by their pk_id (e.g. the stats summaries) derive from it directly
+    pass
+
+class BaseModel(Base):
+    __abstract__ = True
+    # Public identifier of every by-ID route; unique index so lookups don't scan the table
+    id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid = True), default = uuid4, nullable = False, unique = True, index = True)
@@ -0,0 +1,87 @@
+from typing import Optional, TypeVar
+from fastapi_pagination.api import create_page, resolve_params
+from fastapi_pagination.bases import AbstractPage
+from fastapi_pagination.cursor import CursorPage as BaseCursorPage
+from fastapi_pagination.customization import CustomizedPage, UseExcludedFields, UseFieldsAliases, UseName
+from fastapi_pagination.utils import disable_installed_extensions_check
+from fastapi_pagination.ext.sqlalchemy import create_count_query, paginate as sqlalchemy_paginate
+from sqlalchemy import BigInteger, Integer, Select, bindparam, column, func, select, table
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from workout_api.configs.settings import settings
+
+T = TypeVar("T")
+
+# In-memory pagination is used on purpose for the cached categories and gyms lists
+disable_installed_extensions_check()
+
+# Keyset page: the query's ORDER BY columns are encoded into an opaque next_cursor
+CursorPage = CustomizedPage[
+    BaseCursorPage[T],
+    UseName("CursorPage"),
+    UseExcludedFields("total", "current_page", "current_page_backwards", "previous_page"),
+    UseFieldsAliases(next_page = "next_cursor"),
+]
+
+
+class PreparedQuery:
+    # Page and count statements built once, e.g. at import, so their cache keys are computed once too;
+    # the filters are bound parameters whose values are given per request
+    def __init__(self, query: Select, count_query: Optional[Select] = None) -> None:
+        self.page_query = query.limit(bindparam("limit", type_ = Integer)).offset(bindparam("offset", type_ = Integer))
+        self.count_query = create_count_query(query) if count_query is None else count_query
+
+
+def approximate_count_query(table_name: str) -> Select:
+    # Row estimate kept up to date by ANALYZE/autovacuum, avoids scanning the whole table
+    pg_class = table("pg_class", column("relname"), column("reltuples"))
+    return select(
+        func.greatest(pg_class.c.reltuples, 0).cast(BigInteger)
+    ).where(pg_class.c.relname == table_name)
+
+
+def approximate_count(db_session: AsyncSession, approximate_count_table: Optional[str]) -> Optional[Select]:
+    if (
+        approximate_count_table
+        and settings.PAGINATION_APPROXIMATE_COUNT
+        and db_session.bind.dialect.name == "postgresql"
+    ):
+        return approximate_count_query(approximate_count_table)
+    return None
+
+
+async def paginate_prepared(
+    db_session: AsyncSession,
+    query: PreparedQuery,
+    values: dict,
+    count_query: Optional[Select] = None
+) -> AbstractPage:
+    params = resolve_params()
+    raw_params = params.to_raw_params().as_limit_offset()
+    total = await db_session.scalar(query.count_query if count_query is None else count_query, values)
+    items = (await db_session.scalars(query.page_query, {**values, "limit": raw_params.limit, "offset": raw_params.offset})).all()
+    return create_page(items, total = total, params = params)
+
+
+async def paginate(
+    db_session: AsyncSession,
+    query: Select | PreparedQuery,
+    approximate_count_table: Optional[str] = None,
+    count_query: Optional[Select] = None,
+    values: Optional[dict] = None
+) -> AbstractPage:
+    # LIMIT/OFFSET and count(*) are both run by the database, only one page is loaded
+    approximate_query = approximate_count(db_session, approximate_count_table)
+    if approximate_query is not None:
+        count_query = approximate_query
+    if isinstance(query, PreparedQuery):
+        return await paginate_prepared(db_session, query, values or {}, count_query)
+    if count_query is None:
+        return await sqlalchemy_paginate(db_session, query)
+
+    # fastapi-pagination tests count_query for truthiness, which a Select does not support
+    params = resolve_params()
+    raw_params = params.to_raw_params().as_limit_offset()
+    total = await db_session.scalar(count_query)
+    items = (await db_session.scalars(query.limit(raw_params.limit).offset(raw_params.offset))).all()
+    return create_page(items, total = total, params = params)
@@ -1,3 +1,4 @@
 from workout_api.categories.models import CategoryModel
-from workout_api.athletes.models import AthleteModel
+from workout_api.athletes.models import AthleteModel, AthleteTombstoneModel
 from workout_api.gyms.models import GymModel
+from workout_api.stats.models import CategoryStatsModel, GymStatsModel
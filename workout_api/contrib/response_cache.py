@@ -0,0 +1,171 @@
+import hashlib
+import logging
+from typing import Callable, Optional
+from urllib.parse import urlencode
+from fastapi import Request, Response, status
+from fastapi.responses import StreamingResponse
+
+from workout_api.configs.settings import settings
+from workout_api.contrib.cache import TTLCache
+from workout_api.contrib.single_flight import single_flight
+from workout_api.contrib.timing import TimedRoute
+
+# Backend errors (e.g. Redis down) are logged here and the request is served without the cache
+cache_log = logging.getLogger("workout_api.response_cache")
+
+
+class MemoryBackend:
+    def __init__(self, maxsize: int) -> None:
+        self.entries = TTLCache(maxsize, settings.RESPONSE_CACHE_TTL)
+        self.generations: dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self.entries.get(key)
+
+    async def set(self, key: str, value: bytes) -> None:
+        self.entries.set(key, value)
+
+    async def generation(self, namespace: str) -> int:
+        return self.generations.get(namespace, 0)
+
+    async def bump(self, namespace: str) -> None:
+        self.generations[namespace] = self.generations.get(namespace, 0) + 1
+
+
+class RedisBackend:
+    def __init__(self, url: str) -> None:
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(f"response:{key}")
+
+    async def set(self, key: str, value: bytes) -> None:
+        await self.client.set(f"response:{key}", value, ex = settings.RESPONSE_CACHE_TTL)
+
+    async def generation(self, namespace: str) -> int:
+        return int(await self.client.get(f"generation:{namespace}") or 0)
+
+    async def bump(self, namespace: str) -> None:
+        await self.client.incr(f"generation:{namespace}")
+
+
+class ResponseCache:
+    # Entries are keyed by namespace generation, so invalidating a namespace is a single counter bump
+    def __init__(self, backend: Optional[MemoryBackend | RedisBackend]) -> None:
+        self.backend = backend
+
+    async def key(self, namespace: str, request: Request) -> Optional[str]:
+        # None when the backend can't be reached, the request then skips the cache
+        query = urlencode(sorted(request.query_params.multi_items()))
+        try:
+            generation = await self.backend.generation(namespace)
+        except Exception:
+            cache_log.exception("Response cache unavailable, serving %s without it", request.url.path)
+            return None
+        return f"{namespace}:{generation}:{request.url.path}?{query}"
+
+    async def get(self, key: str) -> Optional[tuple[str, bytes]]:
+        try:
+            value = await self.backend.get(key)
+        except Exception:
+            cache_log.exception("Response cache read failed for %s", key)
+            return None
+        if value is None:
+            return None
+        etag, body = value.split(b"\n", 1)
+        return etag.decode(), body
+
+    async def set(self, key: str, body: bytes) -> Optional[str]:
+        etag = f'"{hashlib.blake2b(body, digest_size = 16).hexdigest()}"'
+        try:
+            await self.backend.set(key, etag.encode() + b"\n" + body)
+        except Exception:
+            cache_log.exception("Response cache write failed for %s", key)
+            return None
+        return etag
+
+    async def invalidate(self, namespace: str) -> None:
+        # Called after writes are committed, so a backend error must not fail the write's response;
+        # entries of the namespace may then be served until RESPONSE_CACHE_TTL
+        single_flight.bump(namespace)
+        if self.backend is not None:
+            try:
+                await self.backend.bump(namespace)
+            except Exception:
+                cache_log.exception("Response cache invalidation of %s failed", namespace)
+
+
+def build_backend() -> Optional[MemoryBackend | RedisBackend]:
+    if settings.RESPONSE_CACHE_BACKEND == "redis":
+        return RedisBackend(settings.REDIS_URL)
+    if settings.RESPONSE_CACHE_BACKEND == "memory":
+        return MemoryBackend(settings.RESPONSE_CACHE_MAXSIZE)
+    return None
+
+response_cache = ResponseCache(build_backend())
+
+
+def cached(namespace: str) -> Callable:
+    # Marks a GET endpoint whose JSON body is cached until `namespace` is invalidated
+    def decorator(endpoint: Callable) -> Callable:
+        endpoint.__cache_namespace__ = namespace
+        return endpoint
+    return decorator
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match", "")
+    return if_none_match.strip() == "*" or etag in (value.strip() for value in if_none_match.split(","))
+
+
+class CachedRoute(TimedRoute):
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        namespace = getattr(self.endpoint, "__cache_namespace__", None)
+        if namespace is None:
+            return handler
+
+        async def cached_handler(request: Request) -> Response:
+            # Checked per request, so the backend and REQUEST_COALESCING can change after the routes are built
+            if request.method != "GET" or (response_cache.backend is None and not settings.REQUEST_COALESCING):
+                return await handler(request)
+
+            key = None
+            if response_cache.backend is not None:
+                key = await response_cache.key(namespace, request)
+            if key is not None:
+                hit = await response_cache.get(key)
+                if hit is not None:
+                    etag, body = hit
+                    if etag_matches(request, etag):
+                        return Response(status_code = status.HTTP_304_NOT_MODIFIED, headers = {"ETag": etag})
+                    return Response(content = body, media_type = "application/json", headers = {"ETag": etag})
+
+            async def render() -> Response:
+                response = await handler(request)
+                if key is not None and response.status_code == status.HTTP_200_OK and not isinstance(response, StreamingResponse):
+                    etag = await response_cache.set(key, response.body)
+                    if etag is not None:
+                        response.headers["ETag"] = etag
+                return response
+
+            if settings.REQUEST_COALESCING:
+                # Identical GETs arriving while one is being served wait for its response instead of querying too
+                query = urlencode(sorted(request.query_params.multi_items()))
+                response, shared = await single_flight.do(namespace, f"{request.url.path}?{query}", render)
+                if shared and isinstance(response, StreamingResponse):
+                    # A stream can only be sent once
+                    response = await handler(request)
+                elif shared:
+                    response = Response(content = response.body, status_code = response.status_code, headers = dict(response.headers))
+            else:
+                response = await render()
+
+            etag = response.headers.get("ETag")
+            if etag is not None and etag_matches(request, etag):
+                return Response(status_code = status.HTTP_304_NOT_MODIFIED, headers = {"ETag": etag})
+            return response
+
+        return cached_handler
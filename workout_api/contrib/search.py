@@ -0,0 +1,13 @@
+from sqlalchemy import Select, func, or_
+from sqlalchemy.orm import InstrumentedAttribute
+
+
+def ranked_name_search(query: Select, column: InstrumentedAttribute, pk: InstrumentedAttribute, term: str, dialect_name: str) -> Select:
+    if dialect_name == "postgresql":
+        # Trigram match served by the gin_trgm_ops indexes, most similar names first
+        return query.where(
+            or_(column.op("%")(term), column.icontains(term, autoescape = True))
+        ).order_by(func.similarity(column, term).desc(), pk)
+
+    # Fallback: prefix range served by a plain B-tree index on the column
+    return query.where(column >= term, column < term + "\U0010ffff").order_by(column, pk)
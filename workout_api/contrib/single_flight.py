@@ -0,0 +1,62 @@
+import asyncio
+from typing import Any, Awaitable, Callable
+
+
+class SingleFlight:
+    # Concurrent calls with the same key share one run of the first caller's coroutine (per process)
+    def __init__(self) -> None:
+        self.calls: dict[str, asyncio.Future] = {}
+        self.generations: dict[str, int] = {}
+        self.counters: dict[str, dict[str, int]] = {}
+
+    def key(self, namespace: str, key: str) -> str:
+        # Calls started before an invalidation are not joined by later ones
+        return f"{namespace}:{self.generations.get(namespace, 0)}:{key}"
+
+    def bump(self, namespace: str) -> None:
+        self.generations[namespace] = self.generations.get(namespace, 0) + 1
+
+    async def do(self, namespace: str, key: str, call: Callable[[], Awaitable[Any]]) -> tuple[Any, bool]:
+        # Returns the result and whether it was shared from another caller's run
+        counters = self.counters.setdefault(namespace, {"flights": 0, "shared": 0})
+        key = self.key(namespace, key)
+        while True:
+            future = self.calls.get(key)
+            if future is None:
+                break
+            try:
+                result = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # The first caller was cancelled, not this one: run again
+                if future.cancelled():
+                    continue
+                raise
+            counters["shared"] += 1
+            return result, True
+
+        future = asyncio.get_running_loop().create_future()
+        self.calls[key] = future
+        counters["flights"] += 1
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Retrieved here, so a run nobody joined doesn't log "exception was never retrieved"
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            del self.calls[key]
+
+    def stats(self) -> dict:
+        return {
+            namespace: {**counters, "in_flight": sum(key.startswith(f"{namespace}:") for key in self.calls)}
+            for namespace, counters in self.counters.items()
+        }
+
+single_flight = SingleFlight()
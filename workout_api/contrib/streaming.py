@@ -0,0 +1,46 @@
+from typing import Any, AsyncIterator
+from fastapi import HTTPException, Request, status
+from sqlalchemy import Row, Select
+
+from workout_api.configs.database import read_session
+from workout_api.configs.settings import settings
+from workout_api.contrib.schemas import BaseSchema
+
+
+async def ndjson_stream(query: Select, schema: type[BaseSchema]) -> AsyncIterator[bytes]:
+    # Own session: request-scoped dependencies are closed before a streamed body is sent
+    async with read_session() as session:
+        rows = await session.stream_scalars(query.execution_options(yield_per = settings.STREAM_YIELD_PER))
+        async for row in rows:
+            yield schema.model_validate(row).model_dump_json().encode() + b"\n"
+
+
+async def stream_partitions(query: Select) -> AsyncIterator[list[Row]]:
+    # Server-side cursor, STREAM_YIELD_PER rows at a time
+    async with read_session() as session:
+        result = await session.stream(query.execution_options(yield_per = settings.STREAM_YIELD_PER))
+        async for partition in result.partitions():
+            yield partition
+
+
+async def json_rows(request: Request) -> AsyncIterator[Any]:
+    # NDJSON bodies are split while they arrive; each line is left for the caller to validate
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        buffer = b""
+        async for chunk in request.stream():
+            *lines, buffer = (buffer + chunk).split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield line
+        if buffer.strip():
+            yield buffer
+        return
+
+    rows = await request.json()
+    if not isinstance(rows, list):
+        raise HTTPException(
+            status_code = status.HTTP_400_BAD_REQUEST,
+            detail = "Expected a JSON array or an NDJSON body"
+        )
+    for row in rows:
+        yield row
@@ -0,0 +1,126 @@
+import asyncio
+import functools
+import logging
+import time
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from workout_api.configs.settings import settings
+from workout_api.contrib.metrics import observe_request
+
+slow_query_log = logging.getLogger("workout_api.slow_query")
+
+
+class RequestTiming:
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.route: Optional[str] = None
+        self.queries = 0
+        self.db = 0.0
+        self.handler = 0.0
+        self.handler_end: Optional[float] = None
+        self.serialization = 0.0
+
+    def server_timing(self) -> str:
+        total = time.perf_counter() - self.start
+        return ", ".join([
+            f'db;dur={self.db * 1000:.2f};desc="{self.queries} queries"',
+            f"handler;dur={self.handler * 1000:.2f}",
+            f"serialize;dur={self.serialization * 1000:.2f}",
+            f"total;dur={total * 1000:.2f}",
+        ])
+
+# Timing of the request being served, set by TimingMiddleware
+current_timing: ContextVar[Optional[RequestTiming]] = ContextVar("current_timing", default = None)
+
+
+def listen_query_events(engine: Engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        if context is not None:
+            context.query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        if context is None:
+            return
+        elapsed = time.perf_counter() - context.query_start
+        timing = current_timing.get()
+        if timing is not None:
+            timing.queries += 1
+            timing.db += elapsed
+        if 0 < settings.SLOW_QUERY_THRESHOLD <= elapsed:
+            slow_query_log.warning("%.3fs on %s: %s", elapsed, timing.route if timing else "-", statement)
+
+
+class TimedRoute(APIRoute):
+    # Splits the route time into the endpoint itself and the response validation/serialization after it
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        endpoint = self.dependant.call
+        if not asyncio.iscoroutinefunction(endpoint):
+            return
+
+        @functools.wraps(endpoint)
+        async def timed_endpoint(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                timing = current_timing.get()
+                if timing is not None:
+                    timing.handler_end = time.perf_counter()
+                    timing.handler += timing.handler_end - start
+
+        self.dependant.call = timed_endpoint
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def timed_handler(request: Request) -> Response:
+            timing = current_timing.get()
+            if timing is None:
+                return await handler(request)
+
+            timing.route = self.path
+            response = await handler(request)
+            if timing.handler_end is not None:
+                timing.serialization += time.perf_counter() - timing.handler_end
+            return response
+
+        return timed_handler
+
+
+class TimingMiddleware:
+    # Pure ASGI, so streamed bodies pass through untouched and the timing is shared with the route
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+        token = current_timing.set(timing)
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope = message).append("Server-Timing", timing.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_timing.reset(token)
+            observe_request(scope["method"], timing.route or "unmatched", status_code, timing)
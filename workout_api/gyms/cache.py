@@ -0,0 +1,5 @@
+from workout_api.gyms.models import GymModel
+from workout_api.gyms.schemas import GymOut
+from workout_api.contrib.cache import ModelCache
+
+gym_cache = ModelCache("gyms", GymModel, GymOut)
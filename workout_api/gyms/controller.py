@@ -1,18 +1,28 @@
-from typing import List
 from uuid import uuid4
 from fastapi import APIRouter, Body, HTTPException, status
-from fastapi_pagination import Page, add_pagination, paginate
-from fastapi_pagination.utils import disable_installed_extensions_check
+from fastapi.responses import StreamingResponse
+from fastapi_pagination import Page, paginate as paginate_list
 
 from pydantic import UUID4
+from sqlalchemy import bindparam
 from sqlalchemy.future import select
+from workout_api.gyms.cache import gym_cache
 from workout_api.gyms.schemas import GymIn, GymOut
 from workout_api.gyms.models import GymModel
 
-from workout_api.contrib.dependencies import DatabaseDependency
+from workout_api.contrib.dependencies import DatabaseDependency, ReadDatabaseDependency
+from workout_api.contrib.pagination import PreparedQuery, paginate
+from workout_api.contrib.response_cache import CachedRoute, cached, response_cache
+from workout_api.contrib.search import ranked_name_search
+from workout_api.contrib.streaming import ndjson_stream
+from workout_api.stats.schemas import StatsOut
+from workout_api.stats.summary import group_stats
 
 
-router = APIRouter()
+router = APIRouter(route_class = CachedRoute)
+
+# Statement of the /name:{name} route, built once
+gym_name_page = PreparedQuery(select(GymModel).where(GymModel.name.contains(bindparam("name"))).order_by(GymModel.pk_id))
 
 @router.post(
         path = '/',
@@ -37,6 +47,8 @@ async def post(
     gym_model = GymModel(**gym_out.model_dump())
     db_session.add(gym_model)
     await db_session.commit()
+    gym_cache.invalidate()
+    await response_cache.invalidate("gyms")
     return gym_out
 
 
@@ -46,10 +58,11 @@ async def post(
         status_code = status.HTTP_200_OK,
         response_model = Page[GymOut]
 )
+@cached("gyms")
 
-async def query(db_session: DatabaseDependency) -> Page[GymOut]:
-    gyms: List[GymOut] = (await db_session.execute(select(GymModel))).scalars().all()
-    return paginate(gyms)
+async def query(db_session: ReadDatabaseDependency) -> Page[GymOut]:
+    # Small, rarely written table: the whole list is cached and paginated in memory
+    return paginate_list(await gym_cache.all(db_session))
 
 @router.get(
         path = '/name:{name}',
@@ -57,18 +70,62 @@ async def query(db_session: DatabaseDependency) -> Page[GymOut]:
         status_code = status.HTTP_200_OK,
         response_model = Page[GymOut]
 )
+@cached("gyms")
 
-async def query(name: str, db_session: DatabaseDependency) -> Page[GymOut]:
+async def query(name: str, db_session: ReadDatabaseDependency) -> Page[GymOut]:
     
-    query = select(GymModel).where(GymModel.name.contains(name))
-    results = await db_session.execute(query)
-    gym: List[GymOut] = results.scalars().all()
+    gym: Page[GymOut] = await paginate(db_session, gym_name_page, values = {"name": name})
 
-    
-    if not gym:
+    if not gym.total:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail = f"Gym not found by name: {name}")
+
+    return gym
+
+@router.get(
+        path = '/search:{name}',
+        summary = "Search Gyms by name, best matches first",
+        status_code = status.HTTP_200_OK,
+        response_model = Page[GymOut]
+)
+
+async def query(name: str, db_session: ReadDatabaseDependency, stream: bool = False) -> Page[GymOut]:
+
+    query = ranked_name_search(select(GymModel), GymModel.name, GymModel.pk_id, name, db_session.bind.dialect.name)
+    if stream:
+        return StreamingResponse(ndjson_stream(query, GymOut), media_type = "application/x-ndjson")
+
+    gym: Page[GymOut] = await paginate(db_session, query)
+
+    if not gym.total:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail = f"Gym not found by name: {name}")
 
-    return paginate(gym)
+    return gym
+
+@router.get(
+        path = '/stats',
+        summary = "Athlete stats of every gym",
+        status_code = status.HTTP_200_OK,
+        response_model = list[StatsOut]
+)
+
+async def query(db_session: ReadDatabaseDependency) -> list[StatsOut]:
+    # Aggregated in SQL, or read from the summary table when STATS_SUMMARY is on
+    return await group_stats(db_session, GymModel)
+
+@router.get(
+        path = '/{id}/stats',
+        summary = "Athlete stats of a gym",
+        status_code = status.HTTP_200_OK,
+        response_model = StatsOut
+)
+
+async def query(id: UUID4, db_session: ReadDatabaseDependency) -> StatsOut:
+    stats = await group_stats(db_session, GymModel, id)
+
+    if not stats:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail = f"Gym not found: {id}")
+
+    return stats[0]
 
 @router.get(
         path = '/{id}',
@@ -76,11 +133,10 @@ async def query(name: str, db_session: DatabaseDependency) -> Page[GymOut]:
         status_code = status.HTTP_200_OK,
         response_model = GymOut
 )
+@cached("gyms")
 
-async def query(id: UUID4, db_session: DatabaseDependency) -> GymOut:
-    gym: GymOut = (
-        await db_session.execute(select(GymModel).filter_by(id = id))
-    ).scalars().first()
+async def query(id: UUID4, db_session: ReadDatabaseDependency) -> GymOut:
+    gym: GymOut = await gym_cache.get_by_id(db_session, id)
     
     if not gym:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail = f"Gym not found: {id}")
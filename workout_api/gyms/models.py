@@ -1,4 +1,4 @@
-from sqlalchemy import Integer, String
+from sqlalchemy import Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from workout_api.contrib.models import BaseModel
 from datetime import datetime
@@ -7,6 +7,10 @@ import workout_api.gyms.config as gym_config
 
 class GymModel(BaseModel):
     __tablename__ = 'gyms'
+    __table_args__ = (
+        # Other dialects already get a B-tree from the unique constraint on name
+        Index("ix_gyms_name_trgm", "name", postgresql_using = "gin", postgresql_ops = {"name": "gin_trgm_ops"}).ddl_if(dialect = "postgresql"),
+    )
     pk_id: Mapped[int] = mapped_column(Integer, primary_key = True)
     name: Mapped[str] = mapped_column(String(gym_config.name_max_length), unique = True, nullable = False)
     address: Mapped[str] = mapped_column(String(gym_config.address_max_length), nullable = False)
@@ -1,3 +1,6 @@
+import numpy as np
+
+
 class InputValidator:
     @staticmethod
     def is_valid_cpf(cpf: str|int) -> bool:
@@ -23,6 +26,34 @@ class InputValidator:
             return False
 
         return True
+
+    @staticmethod
+    def validate_cpfs(batch: list[str|int]) -> tuple[np.ndarray, list[str]]:
+        # Same rules as is_valid_cpf, checked for the whole batch at once on a digit matrix
+        normalized = [cpf if cpf.isdigit() else ''.join(filter(str.isdigit, cpf)) for cpf in map(str, batch)]
+        mask = np.zeros(len(normalized), dtype = bool)
+
+        # Rows that can be checked as 11 ASCII digits, other digit characters go through is_valid_cpf
+        rows = []
+        for i, cpf in enumerate(normalized):
+            if len(cpf) == 11:
+                if cpf.isascii():
+                    rows.append(i)
+                else:
+                    mask[i] = InputValidator.is_valid_cpf(cpf)
+        if not rows:
+            return mask, normalized
+
+        digits = np.frombuffer(''.join(normalized[i] for i in rows).encode(), dtype = np.uint8).reshape(-1, 11) - ord('0')
+
+        # Calculating both verifier digits with weights 10..2 and 11..2
+        remainder = (digits[:, :9] @ np.arange(10, 1, -1)) % 11
+        verifier1 = np.where(remainder < 2, 0, 11 - remainder)
+        remainder = (digits[:, :10] @ np.arange(11, 1, -1)) % 11
+        verifier2 = np.where(remainder < 2, 0, 11 - remainder)
+
+        mask[rows] = (digits[:, 9] == verifier1) & (digits[:, 10] == verifier2)
+        return mask, normalized
     
     @staticmethod
     def is_length_within_max(input: any, max_length: int = 0) -> bool:
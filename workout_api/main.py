@@ -1,16 +1,33 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 
+from workout_api.athletes.batcher import athlete_batcher
+from workout_api.configs.database import engine, read_engines
+from workout_api.configs.settings import settings
+from workout_api.contrib.timing import TimingMiddleware
 from workout_api.routers import api_router
 from fastapi_pagination import Page, add_pagination, paginate
 
 
-app = FastAPI(title = "Workout API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Commit queued athlete posts, then close pooled connections on shutdown
+    await athlete_batcher.close()
+    await engine.dispose()
+    for read_engine in read_engines:
+        await read_engine.dispose()
+
+
+app = FastAPI(title = "Workout API", lifespan = lifespan)
 app.include_router(api_router)
 add_pagination(app)
+if settings.REQUEST_TIMING:
+    app.add_middleware(TimingMiddleware)
 
 """
 if __name__ == "main":
     import uvicorn
     uvicorn.run("main.app", host = "0.0.0.0", port = 8000, log_level = "info", reload = True)
 
-"""
\ No newline at end of file
+"""
@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Response, status
+
+from workout_api.athletes.batcher import athlete_batcher
+from workout_api.contrib.cache import caches
+from workout_api.contrib.metrics import pools, prometheus_text
+from workout_api.contrib.single_flight import single_flight
+from workout_api.contrib.timing import TimedRoute
+
+
+router = APIRouter(route_class = TimedRoute)
+
+@router.get(
+        path = '',
+        summary = "Per-route request histograms in Prometheus format",
+        status_code = status.HTTP_200_OK,
+        response_class = Response
+)
+
+async def get_prometheus_metrics() -> Response:
+    return Response(content = prometheus_text(), media_type = "text/plain; version=0.0.4")
+
+@router.get(
+        path = '/cache',
+        summary = "Hit and miss counters of the in-process caches",
+        status_code = status.HTTP_200_OK
+)
+
+async def get_cache_metrics() -> dict:
+    return {name: cache.stats() for name, cache in caches.items()}
+
+@router.get(
+        path = '/pool',
+        summary = "Connection pool usage and checkout wait times",
+        status_code = status.HTTP_200_OK
+)
+
+async def get_pool_metrics() -> dict:
+    return {name: pool.snapshot() for name, pool in pools.items()}
+
+@router.get(
+        path = '/coalescing',
+        summary = "Handler runs and responses shared between concurrent identical GETs",
+        status_code = status.HTTP_200_OK
+)
+
+async def get_coalescing_metrics() -> dict:
+    return single_flight.stats()
+
+@router.get(
+        path = '/batching',
+        summary = "Queue depth, batch sizes and flush times of the athlete post batcher",
+        status_code = status.HTTP_200_OK
+)
+
+async def get_batching_metrics() -> dict:
+    return athlete_batcher.snapshot()
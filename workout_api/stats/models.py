@@ -0,0 +1,26 @@
+from sqlalchemy import BigInteger, Float, ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+from workout_api.contrib.models import Base
+
+# Running totals per gym and per category, kept by the athlete routes when STATS_SUMMARY is on.
+# pk_id is the gym's or category's own primary key, there is no public id; averages are the sums over athletes.
+
+class GymStatsModel(Base):
+    __tablename__ = 'gym_stats'
+    pk_id: Mapped[int] = mapped_column(ForeignKey("gyms.pk_id", ondelete = "CASCADE"), primary_key = True)
+    athletes: Mapped[int] = mapped_column(Integer, nullable = False, default = 0)
+    male: Mapped[int] = mapped_column(Integer, nullable = False, default = 0)
+    female: Mapped[int] = mapped_column(Integer, nullable = False, default = 0)
+    age_sum: Mapped[int] = mapped_column(BigInteger, nullable = False, default = 0)
+    weight_sum: Mapped[float] = mapped_column(Float, nullable = False, default = 0)
+    height_sum: Mapped[float] = mapped_column(Float, nullable = False, default = 0)
+
+class CategoryStatsModel(Base):
+    __tablename__ = 'category_stats'
+    pk_id: Mapped[int] = mapped_column(ForeignKey("categories.pk_id", ondelete = "CASCADE"), primary_key = True)
+    athletes: Mapped[int] = mapped_column(Integer, nullable = False, default = 0)
+    male: Mapped[int] = mapped_column(Integer, nullable = False, default = 0)
+    female: Mapped[int] = mapped_column(Integer, nullable = False, default = 0)
+    age_sum: Mapped[int] = mapped_column(BigInteger, nullable = False, default = 0)
+    weight_sum: Mapped[float] = mapped_column(Float, nullable = False, default = 0)
+    height_sum: Mapped[float] = mapped_column(Float, nullable = False, default = 0)
@@ -0,0 +1,84 @@
+from typing import Union
+from sqlalchemy import Float, Insert, Select, case, cast, func, null
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.future import select
+
+from workout_api.athletes.models import AthleteModel
+from workout_api.categories.models import CategoryModel
+from workout_api.gyms.models import GymModel
+from workout_api.stats.models import CategoryStatsModel, GymStatsModel
+
+GroupModel = Union[type[GymModel], type[CategoryModel]]
+StatsModel = Union[type[GymStatsModel], type[CategoryStatsModel]]
+
+stats_models = {GymModel: GymStatsModel, CategoryModel: CategoryStatsModel}
+stats_columns = ["athletes", "male", "female", "age_sum", "weight_sum", "height_sum"]
+
+
+def athlete_group_key(group: GroupModel):
+    return AthleteModel.gym_id if group is GymModel else AthleteModel.category_id
+
+def athlete_totals() -> list:
+    # Aggregates in the order of stats_columns
+    return [
+        func.count(AthleteModel.pk_id).label("athletes"),
+        func.count(case((AthleteModel.sex == "m", 1))).label("male"),
+        func.count(case((AthleteModel.sex == "f", 1))).label("female"),
+        func.coalesce(func.sum(AthleteModel.age), 0).label("age_sum"),
+        func.coalesce(func.sum(AthleteModel.weight), 0).label("weight_sum"),
+        func.coalesce(func.sum(AthleteModel.height), 0).label("height_sum"),
+    ]
+
+def live_stats(group: GroupModel, dialect_name: str) -> Select:
+    # One GROUP BY over the athletes, served by the gym_id/category_id indexes; groups without athletes still show up
+    if dialect_name == "postgresql":
+        medians = [
+            func.percentile_cont(0.5).within_group(column).label(f"median_{column.key}")
+            for column in (AthleteModel.age, AthleteModel.weight, AthleteModel.height)
+        ]
+    else:
+        medians = [null().label(f"median_{key}") for key in ("age", "weight", "height")]
+
+    return select(
+        group.id,
+        group.name,
+        *athlete_totals()[:3],
+        cast(func.avg(AthleteModel.age), Float).label("avg_age"),
+        cast(func.avg(AthleteModel.weight), Float).label("avg_weight"),
+        cast(func.avg(AthleteModel.height), Float).label("avg_height"),
+        *medians,
+    ).select_from(group).outerjoin(AthleteModel, athlete_group_key(group) == group.pk_id).group_by(
+        group.pk_id, group.id, group.name
+    ).order_by(group.pk_id)
+
+def summary_stats(group: GroupModel) -> Select:
+    # Reads one summary row per group, whatever the number of athletes
+    stats = stats_models[group]
+    athletes = func.nullif(stats.athletes, 0)
+    return select(
+        group.id,
+        group.name,
+        func.coalesce(stats.athletes, 0).label("athletes"),
+        func.coalesce(stats.male, 0).label("male"),
+        func.coalesce(stats.female, 0).label("female"),
+        (cast(stats.age_sum, Float) / athletes).label("avg_age"),
+        (stats.weight_sum / athletes).label("avg_weight"),
+        (stats.height_sum / athletes).label("avg_height"),
+        null().label("median_age"),
+        null().label("median_weight"),
+        null().label("median_height"),
+    ).select_from(group).outerjoin(stats, stats.pk_id == group.pk_id).order_by(group.pk_id)
+
+def group_totals(group: GroupModel) -> Select:
+    # Summary rows recomputed from scratch, for the rebuild
+    key = athlete_group_key(group)
+    return select(key.label("pk_id"), *athlete_totals()).group_by(key)
+
+def add_to_stats(dialect_name: str, stats: StatsModel, rows: list[dict]) -> Insert:
+    # Deltas added to the current totals in one statement; the row is created on the group's first athlete
+    dialect_insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    statement = dialect_insert(stats).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements = ["pk_id"],
+        set_ = {key: getattr(stats, key) + getattr(statement.excluded, key) for key in stats_columns}
+    )
@@ -0,0 +1,23 @@
+import asyncio
+import json
+import sys
+
+from workout_api.configs.database import engine
+from workout_api.stats.summary import rebuild_stats
+
+# Recomputes the gym_stats and category_stats summaries in one transaction, e.g.
+#   python -m workout_api.stats.rebuild
+# Run it after turning STATS_SUMMARY on; the athlete routes only add their own changes to the totals.
+
+
+async def main() -> None:
+    try:
+        async with engine.begin() as connection:
+            rebuilt = await rebuild_stats(connection)
+    finally:
+        await engine.dispose()
+    print(json.dumps(rebuilt), file = sys.stderr)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
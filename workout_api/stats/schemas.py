@@ -0,0 +1,18 @@
+from typing import Annotated, Optional
+from pydantic import UUID4, Field
+from workout_api.contrib.schemas import BaseSchema
+
+
+class StatsOut(BaseSchema):
+    id: Annotated[UUID4, Field(description = "Gym or category identifier")]
+    name: Annotated[str, Field(description = "Gym or category name", example = "Casa de Pedra")]
+    athletes: Annotated[int, Field(description = "Number of athletes", example = 120)]
+    male: Annotated[int, Field(description = "Athletes with sex m", example = 64)]
+    female: Annotated[int, Field(description = "Athletes with sex f", example = 56)]
+    avg_age: Annotated[Optional[float], Field(None, description = "Average age", example = 31.4)]
+    avg_weight: Annotated[Optional[float], Field(None, description = "Average weight (kg)", example = 78.2)]
+    avg_height: Annotated[Optional[float], Field(None, description = "Average height (m)", example = 1.74)]
+    # Only computed on PostgreSQL and not kept in the summary tables
+    median_age: Annotated[Optional[float], Field(None, description = "Median age, live PostgreSQL queries only", example = 30)]
+    median_weight: Annotated[Optional[float], Field(None, description = "Median weight (kg), live PostgreSQL queries only", example = 77.5)]
+    median_height: Annotated[Optional[float], Field(None, description = "Median height (m), live PostgreSQL queries only", example = 1.75)]
@@ -0,0 +1,96 @@
+from typing import Any, Mapping, Optional
+
+from pydantic import UUID4
+from sqlalchemy import Row, Select, delete, insert, text, update
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from workout_api.athletes.models import AthleteModel
+from workout_api.configs.settings import settings
+from workout_api.stats.queries import GroupModel, add_to_stats, athlete_group_key, group_totals, live_stats, stats_columns, stats_models, summary_stats
+
+# Athlete columns the summaries depend on, selected or returned by the write routes
+athlete_stats_columns = [
+    AthleteModel.gym_id, AthleteModel.category_id, AthleteModel.sex, AthleteModel.age, AthleteModel.weight, AthleteModel.height
+]
+
+
+def athlete_stats_values(athlete: Any) -> dict:
+    # Snapshot of a loaded athlete, taken before it is changed
+    return {column.key: getattr(athlete, column.key) for column in athlete_stats_columns}
+
+
+def locked_for_stats(query: Select) -> Select:
+    # Athletes read before a change stay locked until the commit, so concurrent writes can't
+    # both take the same old values out of the summaries
+    return query.with_for_update(of = AthleteModel) if settings.STATS_SUMMARY else query
+
+
+class StatsDelta:
+    # Changes to the gym and category summaries, written in the same transaction as the athletes
+    def __init__(self) -> None:
+        self.totals: dict[GroupModel, dict[int, list]] = {group: {} for group in stats_models}
+
+    def add(self, athlete: Mapping, sign: int = 1) -> None:
+        values = [
+            sign,
+            sign if athlete["sex"] == "m" else 0,
+            sign if athlete["sex"] == "f" else 0,
+            sign * athlete["age"],
+            sign * athlete["weight"],
+            sign * athlete["height"],
+        ]
+        for group, totals in self.totals.items():
+            current = totals.setdefault(athlete[athlete_group_key(group).key], [0] * len(stats_columns))
+            for index, value in enumerate(values):
+                current[index] += value
+
+    def remove(self, athlete: Mapping) -> None:
+        self.add(athlete, sign = -1)
+
+    async def apply(self, db_session: AsyncSession) -> None:
+        if not settings.STATS_SUMMARY:
+            return
+        dialect_name = db_session.bind.dialect.name
+        for group, totals in self.totals.items():
+            stats = stats_models[group]
+            # Sorted, so concurrent transactions lock the summary rows in the same order
+            rows = [
+                {"pk_id": pk_id, **dict(zip(stats_columns, values))}
+                for pk_id, values in sorted(totals.items()) if any(values)
+            ]
+            if not rows:
+                continue
+            if dialect_name in ("postgresql", "sqlite"):
+                await db_session.execute(add_to_stats(dialect_name, stats, rows))
+                continue
+            for row in rows:
+                updated = await db_session.execute(update(stats).where(stats.pk_id == row["pk_id"]).values({
+                    key: getattr(stats, key) + row[key] for key in stats_columns
+                }))
+                if not updated.rowcount:
+                    await db_session.execute(insert(stats).values(row))
+
+
+async def group_stats(db_session: AsyncSession, group: GroupModel, id: Optional[UUID4] = None) -> list[Row]:
+    if settings.STATS_SUMMARY:
+        query = summary_stats(group)
+    else:
+        query = live_stats(group, db_session.bind.dialect.name)
+    if id is not None:
+        query = query.where(group.id == id)
+    return (await db_session.execute(query)).all()
+
+
+async def rebuild_stats(connection: AsyncConnection) -> dict[str, int]:
+    # Summaries recomputed from the athletes table, e.g. after turning STATS_SUMMARY on
+    if connection.dialect.name == "postgresql":
+        # Writers wait for the rebuild instead of updating rows it is about to replace
+        await connection.execute(text(f"LOCK TABLE {AthleteModel.__tablename__} IN SHARE MODE"))
+    rebuilt = {}
+    for group, stats in stats_models.items():
+        rows = [row._mapping for row in (await connection.execute(group_totals(group))).all()]
+        await connection.execute(delete(stats))
+        if rows:
+            await connection.execute(insert(stats), rows)
+        rebuilt[stats.__tablename__] = len(rows)
+    return rebuilt